@@ -2,38 +2,53 @@ import time
 import uuid
 from typing import Optional
 from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import Response
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.audit.logger import audit_logger
 from app.audit.events import AuditEventType, AuditEventBuilder
 
 
-class AuditMiddleware(BaseHTTPMiddleware):
-    SENSITIVE_PATHS = ["/auth/login", "/auth/register", "/auth/logout"]
-    EXCLUDED_PATHS = ["/health", "/docs", "/openapi.json", "/favicon.ico"]
+class AuditMiddleware:
+    """
+    Pure ASGI audit logging. Reads the response status from
+    ``http.response.start``, where it also adds X-Request-ID, and logs once
+    the response has been sent.
+    """
+    SENSITIVE_PATHS = ("/auth/login", "/auth/register", "/auth/logout")
+    EXCLUDED_PATHS = ("/health", "/docs", "/openapi.json", "/favicon.ico")
     
-    async def dispatch(self, request: Request, call_next) -> Response:
-        if any(request.url.path.startswith(p) for p in self.EXCLUDED_PATHS):
-            return await call_next(request)
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(self.EXCLUDED_PATHS):
+            await self.app(scope, receive, send)
+            return
         
+        request = Request(scope)
         request_id = str(uuid.uuid4())
         start_time = time.time()
         
         client_ip = self._get_client_ip(request)
         user_id = self._get_user_id(request)
+        status_code = 500
         
-        response = await call_next(request)
+        async def send_with_request_id(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message).append("X-Request-ID", request_id)
+            await send(message)
+        
+        await self.app(scope, receive, send_with_request_id)
         
         duration_ms = (time.time() - start_time) * 1000
         
-        if any(request.url.path.startswith(p) for p in self.SENSITIVE_PATHS):
-            self._log_auth_event(request, response, client_ip, user_id, duration_ms)
+        if scope["path"].startswith(self.SENSITIVE_PATHS):
+            self._log_auth_event(request, status_code, client_ip, user_id, duration_ms)
         else:
-            self._log_api_event(request, response, client_ip, user_id, duration_ms, request_id)
-        
-        response.headers["X-Request-ID"] = request_id
-        return response
+            self._log_api_event(request, status_code, client_ip, user_id, duration_ms, request_id)
     
     def _get_client_ip(self, request: Request) -> str:
         forwarded = request.headers.get("X-Forwarded-For")
@@ -54,7 +69,7 @@ class AuditMiddleware(BaseHTTPMiddleware):
     def _log_auth_event(
         self,
         request: Request,
-        response: Response,
+        status_code: int,
         client_ip: str,
         user_id: Optional[str],
         duration_ms: float,
@@ -62,7 +77,7 @@ class AuditMiddleware(BaseHTTPMiddleware):
         path = request.url.path
         
         if "/login" in path:
-            event_type = AuditEventType.USER_LOGIN if response.status_code == 200 else AuditEventType.AUTH_FAILED_LOGIN
+            event_type = AuditEventType.USER_LOGIN if status_code == 200 else AuditEventType.AUTH_FAILED_LOGIN
         elif "/register" in path:
             event_type = AuditEventType.USER_REGISTER
         elif "/logout" in path:
@@ -70,7 +85,7 @@ class AuditMiddleware(BaseHTTPMiddleware):
         else:
             return
         
-        outcome = "success" if 200 <= response.status_code < 300 else "failure"
+        outcome = "success" if 200 <= status_code < 300 else "failure"
         
         event = (
             AuditEventBuilder(event_type)
@@ -78,7 +93,7 @@ class AuditMiddleware(BaseHTTPMiddleware):
             .action(f"{request.method} {path}")
             .outcome(outcome)
             .metadata(
-                status_code=response.status_code,
+                status_code=status_code,
                 duration_ms=round(duration_ms, 2),
             )
             .build()
@@ -89,13 +104,13 @@ class AuditMiddleware(BaseHTTPMiddleware):
     def _log_api_event(
         self,
         request: Request,
-        response: Response,
+        status_code: int,
         client_ip: str,
         user_id: Optional[str],
         duration_ms: float,
         request_id: str,
     ) -> None:
-        outcome = "success" if 200 <= response.status_code < 300 else "failure"
+        outcome = "success" if 200 <= status_code < 300 else "failure"
         
         event = (
             AuditEventBuilder(AuditEventType.API_REQUEST)
@@ -106,7 +121,7 @@ class AuditMiddleware(BaseHTTPMiddleware):
                 request_id=request_id,
                 method=request.method,
                 path=request.url.path,
-                status_code=response.status_code,
+                status_code=status_code,
                 duration_ms=round(duration_ms, 2),
                 user_agent=request.headers.get("User-Agent", ""),
             )
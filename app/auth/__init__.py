@@ -1,11 +1,29 @@
-from app.auth.jwt import create_access_token, verify_token
+from app.auth.jwt import (
+    create_access_token,
+    create_refresh_token,
+    revoke_token,
+    verify_token,
+    verify_token_cached,
+)
 from app.auth.middleware import require_auth
-from app.auth.password import hash_password, verify_password
+from app.auth.password import (
+    hash_password,
+    verify_password,
+    needs_rehash,
+    hash_password_async,
+    verify_password_async,
+)
 
 __all__ = [
     "create_access_token",
+    "create_refresh_token",
+    "revoke_token",
     "verify_token", 
+    "verify_token_cached",
     "require_auth",
     "hash_password",
     "verify_password",
+    "needs_rehash",
+    "hash_password_async",
+    "verify_password_async",
 ]
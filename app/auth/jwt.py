@@ -3,12 +3,26 @@ import hashlib
 import hmac
 import json
 import base64
+import threading
+import uuid
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
+
+from app.auth.revocation import get_revocation_store
+from app.config.settings import settings
 
 SECRET_KEY = os.getenv("JWT_SECRET", "dev-secret-change-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+REFRESH_TOKEN_EXPIRE_DAYS = settings.auth.refresh_token_expire_days
+TOKEN_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", "10000"))
+
+revocation_store = get_revocation_store()
+
+
+def _now() -> float:
+    return datetime.utcnow().timestamp()
 
 
 def _base64url_encode(data: bytes) -> str:
@@ -32,16 +46,26 @@ def _create_signature(header_payload: str) -> str:
 
 
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
+    if not expires_delta:
+        expires_delta = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    return _create_token(data, expires_delta, "access")
+
+
+def create_refresh_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
+    if not expires_delta:
+        expires_delta = timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    return _create_token(data, expires_delta, "refresh")
+
+
+def _create_token(data: Dict[str, Any], expires_delta: timedelta, token_type: str) -> str:
     to_encode = data.copy()
-    
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    expire = datetime.utcnow() + expires_delta
     
     to_encode.update({
         "exp": expire.timestamp(),
         "iat": datetime.utcnow().timestamp(),
+        "jti": uuid.uuid4().hex,
+        "type": token_type,
     })
     
     header = {"alg": ALGORITHM, "typ": "JWT"}
@@ -54,7 +78,7 @@ def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta]
     return f"{header_payload}.{signature}"
 
 
-def verify_token(token: str) -> Optional[Dict[str, Any]]:
+def verify_token(token: str, token_type: str = "access") -> Optional[Dict[str, Any]]:
     try:
         parts = token.split('.')
         if len(parts) != 3:
@@ -69,7 +93,13 @@ def verify_token(token: str) -> Optional[Dict[str, Any]]:
         payload = json.loads(_base64url_decode(payload_encoded))
         
         exp = payload.get("exp")
-        if exp and datetime.utcnow().timestamp() > exp:
+        if exp and _now() > exp:
+            return None
+        
+        if payload.get("type", "access") != token_type:
+            return None
+        
+        if revocation_store.is_revoked(payload.get("jti")):
             return None
         
         return payload
@@ -77,6 +107,102 @@ def verify_token(token: str) -> Optional[Dict[str, Any]]:
         return None
 
 
+class TokenCache:
+    """
+    Bounded LRU of verified token payloads keyed by signature segment.
+
+    An entry is only served when the header.payload part matches the one
+    that was verified, and never past the token's ``exp``. Tokens without
+    ``exp`` are not cached.
+    """
+
+    def __init__(self, max_size: int = TOKEN_CACHE_SIZE):
+        self._entries: "OrderedDict[str, Tuple[str, Dict[str, Any], float]]" = OrderedDict()
+        self._max_size = max_size
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, signature: str, header_payload: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(signature)
+            if entry is None or entry[0] != header_payload:
+                self._misses += 1
+                return None
+            if _now() > entry[2]:
+                del self._entries[signature]
+                self._misses += 1
+                return None
+            self._entries.move_to_end(signature)
+            self._hits += 1
+            return dict(entry[1])
+
+    def set(self, signature: str, header_payload: str, payload: Dict[str, Any]) -> None:
+        exp = payload.get("exp")
+        if not exp:
+            return
+        with self._lock:
+            self._entries[signature] = (header_payload, dict(payload), exp)
+            self._entries.move_to_end(signature)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, token: str) -> None:
+        with self._lock:
+            self._entries.pop(token.rpartition('.')[2], None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._hits = 0
+            self._misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self._hits + self._misses
+            hit_rate = self._hits / total if total > 0 else 0
+            return {
+                "size": len(self._entries),
+                "max_size": self._max_size,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(hit_rate, 4),
+            }
+
+
+token_cache = TokenCache()
+
+
+def verify_token_cached(token: str) -> Optional[Dict[str, Any]]:
+    header_payload, _, signature = token.rpartition('.')
+    if not header_payload:
+        return None
+
+    payload = token_cache.get(signature, header_payload)
+    if payload is not None:
+        if revocation_store.is_revoked(payload.get("jti")):
+            return None
+        return payload
+
+    payload = verify_token(token)
+    if payload is not None:
+        token_cache.set(signature, header_payload, payload)
+    return payload
+
+
+def revoke_token(payload: Dict[str, Any]) -> bool:
+    """
+    Revoke a verified token until its exp. Returns False if it was already
+    revoked or carries no jti; raises RevocationStoreFullError if the
+    revocation cannot be recorded.
+    """
+    jti = payload.get("jti")
+    if not jti:
+        return False
+    expires_at = payload.get("exp") or _now() + REFRESH_TOKEN_EXPIRE_DAYS * 86400
+    return revocation_store.revoke(jti, expires_at)
+
+
 def decode_token_unsafe(token: str) -> Optional[Dict[str, Any]]:
     try:
         parts = token.split('.')
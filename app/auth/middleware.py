@@ -3,7 +3,7 @@ from typing import Callable, Optional
 from fastapi import Request, HTTPException, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
-from app.auth.jwt import verify_token
+from app.auth.jwt import verify_token_cached
 
 security = HTTPBearer(auto_error=False)
 
@@ -15,7 +15,7 @@ async def get_current_user(
         return None
     
     token = credentials.credentials
-    payload = verify_token(token)
+    payload = verify_token_cached(token)
     
     if not payload:
         raise HTTPException(
@@ -38,7 +38,7 @@ async def require_auth(
         )
     
     token = credentials.credentials
-    payload = verify_token(token)
+    payload = verify_token_cached(token)
     
     if not payload:
         raise HTTPException(
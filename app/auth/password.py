@@ -1,35 +1,205 @@
+import asyncio
 import hashlib
 import os
 import hmac
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple, TypeVar
+
+from app.config.settings import settings
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
 
 SALT_LENGTH = 32
-ITERATIONS = 100000
+ALGORITHM = "pbkdf2_sha256"
+LEGACY_ITERATIONS = 100000
+MIN_ITERATIONS = 10000
+# Calibration varies from run to run and host to host; hashes within this
+# fraction below a calibrated policy are still considered current.
+CALIBRATION_TOLERANCE = 0.2
+
+_iterations: Optional[int] = None
+_iterations_lock = threading.Lock()
+
+
+def calibrate_iterations(target_ms: float, sample_iterations: int = 20000) -> int:
+    """
+    Iteration count whose hash takes about target_ms on this host.
+
+    PBKDF2 cost is linear in iterations, so one timed sample (best of
+    three, to shrug off scheduling noise) is scaled to the budget. The
+    result is rounded to a thousand and never below MIN_ITERATIONS.
+    """
+    salt = os.urandom(SALT_LENGTH)
+    best = float("inf")
+    for _ in range(3):
+        started = time.perf_counter()
+        hashlib.pbkdf2_hmac('sha256', b"calibration", salt, sample_iterations)
+        best = min(best, time.perf_counter() - started)
+
+    iterations = int(sample_iterations * (target_ms / 1000) / best)
+    return max(MIN_ITERATIONS, round(iterations, -3))
+
 
+def get_iterations() -> int:
+    """
+    Current policy: calibrated when a target budget is set, else configured.
+    Calibration runs once per process; the app calls this at startup so no
+    request pays for it.
+    """
+    global _iterations
+    if _iterations is None:
+        with _iterations_lock:
+            if _iterations is None:
+                target_ms = settings.auth.password_hash_target_ms
+                if target_ms > 0:
+                    _iterations = calibrate_iterations(target_ms)
+                    logger.info(f"Calibrated PBKDF2 to {_iterations} iterations for {target_ms} ms")
+                else:
+                    _iterations = settings.auth.password_hash_iterations
+    return _iterations
 
-def hash_password(password: str) -> str:
+
+def set_iterations(iterations: int) -> None:
+    global _iterations
+    with _iterations_lock:
+        _iterations = iterations
+
+
+def _parse_hash(stored_hash: str) -> Tuple[str, int, bytes, bytes]:
+    # Legacy hashes are "salt:key" at a fixed 100k iterations.
+    if '$' not in stored_hash:
+        salt_hex, key_hex = stored_hash.split(':')
+        return "legacy", LEGACY_ITERATIONS, bytes.fromhex(salt_hex), bytes.fromhex(key_hex)
+    algorithm, iterations, salt_hex, key_hex = stored_hash.split('$')
+    return algorithm, int(iterations), bytes.fromhex(salt_hex), bytes.fromhex(key_hex)
+
+
+def hash_password(password: str, iterations: Optional[int] = None) -> str:
+    iterations = iterations or get_iterations()
     salt = os.urandom(SALT_LENGTH)
     key = hashlib.pbkdf2_hmac(
         'sha256',
         password.encode('utf-8'),
         salt,
-        ITERATIONS
+        iterations
     )
-    return f"{salt.hex()}:{key.hex()}"
+    return f"{ALGORITHM}${iterations}${salt.hex()}${key.hex()}"
 
 
 def verify_password(password: str, stored_hash: str) -> bool:
     try:
-        salt_hex, key_hex = stored_hash.split(':')
-        salt = bytes.fromhex(salt_hex)
-        stored_key = bytes.fromhex(key_hex)
+        algorithm, iterations, salt, stored_key = _parse_hash(stored_hash)
+        if algorithm not in (ALGORITHM, "legacy"):
+            return False
         
         new_key = hashlib.pbkdf2_hmac(
             'sha256',
             password.encode('utf-8'),
             salt,
-            ITERATIONS
+            iterations
         )
         
         return hmac.compare_digest(new_key, stored_key)
     except Exception:
         return False
+
+
+def needs_rehash(stored_hash: str) -> bool:
+    """
+    True when stored_hash is in the legacy format or weaker than the current
+    policy. Hashes stronger than the policy are kept, so hosts that
+    calibrate differently do not rehash each other's hashes back and forth.
+    """
+    try:
+        algorithm, iterations, _, _ = _parse_hash(stored_hash)
+    except Exception:
+        return False
+    floor = get_iterations()
+    if settings.auth.password_hash_target_ms > 0:
+        floor = int(floor * (1 - CALIBRATION_TOLERANCE))
+    return algorithm != ALGORITHM or iterations < floor
+
+
+class PasswordHasherBusyError(RuntimeError):
+    pass
+
+
+class PasswordHasher:
+    """
+    Runs PBKDF2 on a bounded thread pool so hashing never blocks the event
+    loop. hashlib releases the GIL while deriving keys, so threads give real
+    parallelism. At most ``max_workers`` hashes run at once and at most
+    ``queue_limit`` more wait, counting work whose caller was cancelled
+    until it actually finishes; beyond that callers get
+    PasswordHasherBusyError instead of piling up unbounded work.
+    """
+
+    def __init__(self, max_workers: int = 4, queue_limit: int = 64):
+        self.max_workers = max_workers
+        self.queue_limit = queue_limit
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix="password-hasher",
+                    )
+        return self._executor
+
+    async def run(self, func: Callable[..., T], *args) -> T:
+        with self._lock:
+            if self._pending >= self.max_workers + self.queue_limit:
+                raise PasswordHasherBusyError("Password hashing queue is full")
+            self._pending += 1
+
+        try:
+            future = self._get_executor().submit(func, *args)
+        except BaseException:
+            self._release()
+            raise
+        # A cancelled caller does not stop a hash already running on a
+        # worker, so the slot is freed when the work itself finishes.
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def _release(self, _future=None) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "queue_limit": self.queue_limit,
+                "pending": self._pending,
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+
+password_hasher = PasswordHasher(
+    max_workers=settings.auth.password_hash_workers,
+    queue_limit=settings.auth.password_hash_queue_limit,
+)
+
+
+async def hash_password_async(password: str) -> str:
+    return await password_hasher.run(hash_password, password)
+
+
+async def verify_password_async(password: str, stored_hash: str) -> bool:
+    return await password_hasher.run(verify_password, password, stored_hash)
@@ -0,0 +1,95 @@
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+import heapq
+import threading
+
+from app.config.settings import settings
+
+
+def _now() -> float:
+    return datetime.utcnow().timestamp()
+
+
+class RevocationStoreFullError(Exception):
+    """Raised when a revocation cannot be recorded without dropping a live one."""
+    pass
+
+
+class RevocationStore:
+    """
+    Revoked token ids (``jti``) kept until the token would have expired anyway.
+
+    Membership is a dict lookup, so the check is cheap enough for every
+    request. A min-heap on expiry lets writes drop entries that no longer
+    matter. An unexpired revocation is never dropped, since its token would
+    become valid again: entries leave only by expiring. If max_entries live
+    revocations are already held, revoke() fails closed by raising
+    RevocationStoreFullError.
+    """
+
+    def __init__(self, max_entries: int = 100000):
+        self._revoked: Dict[str, float] = {}
+        self._expiry: List[Tuple[float, str]] = []
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._rejections = 0
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        return jti is not None and jti in self._revoked
+
+    def revoke(self, jti: str, expires_at: float) -> bool:
+        """Revoke jti until expires_at. Returns False if it was already revoked."""
+        with self._lock:
+            if jti in self._revoked:
+                return False
+            if not self._add(jti, expires_at):
+                self._rejections += 1
+                raise RevocationStoreFullError(
+                    f"{self._max_entries} unexpired revocations held; cannot revoke more"
+                )
+        return True
+
+    def _add(self, jti: str, expires_at: float) -> bool:
+        """Add jti if there is room once expired entries are gone."""
+        self._purge(_now())
+        if len(self._revoked) >= self._max_entries:
+            return False
+        self._revoked[jti] = expires_at
+        heapq.heappush(self._expiry, (expires_at, jti))
+        return True
+
+    def _purge(self, now: float) -> None:
+        expiry = self._expiry
+        while expiry and expiry[0][0] <= now:
+            _, jti = heapq.heappop(expiry)
+            del self._revoked[jti]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._revoked.clear()
+            self._expiry.clear()
+            self._rejections = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._revoked),
+            "max_entries": self._max_entries,
+            "rejections": self._rejections,
+        }
+
+
+@lru_cache()
+def get_revocation_store() -> RevocationStore:
+    """
+    Return the process-wide revocation store selected by
+    ``settings.auth.revocation_store`` ("memory" or "sqlite").
+    """
+    backend = settings.auth.revocation_store
+    max_entries = settings.auth.revocation_max_entries
+    if backend == "memory":
+        return RevocationStore(max_entries)
+    if backend == "sqlite":
+        from app.db.revocations import SQLiteRevocationStore
+        return SQLiteRevocationStore(max_entries)
+    raise ValueError(f"Unknown revocation store backend: {backend}")
@@ -0,0 +1,48 @@
+from typing import Optional
+
+from app.auth.models import AuthUser
+from app.cache.backend import CacheBackend, create_cache_backend
+from app.cache.keys import CacheKey
+from app.config.settings import settings
+from app.models import User
+
+LOCAL_SESSION_TTL = 5
+
+
+def _create_session_cache() -> CacheBackend:
+    """
+    Sessions follow the cache backend. With "resp" they live on the shared
+    server, so invalidate_session in one worker reaches every worker. The
+    in-process cache only hears about this process's writes: with a user
+    store shared across workers, another worker's change can leave a
+    stale /auth/me for up to LOCAL_SESSION_TTL seconds, so entries are
+    kept no longer than that.
+    """
+    config = settings.cache
+    if config.backend == "memory" and settings.database.user_store != "memory":
+        config = config.model_copy(update={"default_ttl": min(config.default_ttl, LOCAL_SESSION_TTL)})
+    return create_cache_backend(config, prefix="auth:")
+
+
+# Kept apart from the shared cache so session hit rate and latency show up
+# on their own in session_cache.stats().
+session_cache = _create_session_cache()
+
+
+def cache_session(user: User) -> AuthUser:
+    auth_user = AuthUser(
+        id=user.id,
+        email=user.email,
+        name=user.name,
+        is_active=user.is_active
+    )
+    session_cache.set(CacheKey.session(str(user.id)), auth_user)
+    return auth_user
+
+
+def get_session(user_id: int) -> Optional[AuthUser]:
+    return session_cache.get(CacheKey.session(str(user_id)))
+
+
+def invalidate_session(user_id: int) -> None:
+    session_cache.delete(CacheKey.session(str(user_id)))
@@ -1,12 +1,18 @@
-from app.cache.backend import CacheBackend, MemoryCache, cache
-from app.cache.decorators import cached, cache_aside
+from app.cache.backend import CacheBackend, MemoryCache, RESPCache, cache
+from app.cache.decorators import cached, cache_aside, invalidate_prefix, invalidate_tag
 from app.cache.keys import CacheKey
+from app.cache.singleflight import SingleFlight, single_flight
 
 __all__ = [
     "CacheBackend",
     "MemoryCache",
+    "RESPCache",
     "cache",
     "cached",
     "cache_aside",
+    "invalidate_tag",
+    "invalidate_prefix",
     "CacheKey",
+    "SingleFlight",
+    "single_flight",
 ]
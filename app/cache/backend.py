@@ -1,8 +1,23 @@
 from abc import ABC, abstractmethod
-from typing import Any, Optional, Dict
-from datetime import datetime, timedelta
+from collections import OrderedDict
+from typing import Any, Optional, Dict, Iterable, List, Set, Tuple
+import heapq
 import threading
+import time
 import json
+import logging
+import pickle
+import weakref
+
+from app.cache.resp import RESPClient, RESPError
+from app.config.settings import CacheSettings, settings
+
+logger = logging.getLogger(__name__)
+
+
+def _check_prefix(prefix: str) -> None:
+    if not prefix.endswith(":"):
+        raise ValueError(f"Cache key prefix must end in ':', got {prefix!r}")
 
 
 class CacheBackend(ABC):
@@ -11,7 +26,11 @@ class CacheBackend(ABC):
         pass
     
     @abstractmethod
-    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
+    def set(self, key: str, value: Any, ttl: Optional[int] = None, tags: Iterable[str] = ()) -> bool:
+        """
+        Store ``value`` for ``ttl`` seconds; None uses the backend's
+        default_ttl, and a ttl (or default) of 0 or less never expires.
+        """
         pass
     
     @abstractmethod
@@ -33,19 +52,50 @@ class CacheBackend(ABC):
     @abstractmethod
     def set_many(self, mapping: Dict[str, Any], ttl: Optional[int] = None) -> bool:
         pass
+    
+    @abstractmethod
+    def invalidate_tag(self, tag: str) -> int:
+        """Delete every key set with ``tag``; returns how many were deleted."""
+        pass
+    
+    @abstractmethod
+    def invalidate_prefix(self, prefix: str) -> int:
+        """
+        Delete every key starting with ``prefix``; returns how many were
+        deleted. The prefix must end in ":" (e.g. "user:" or "user:email:"),
+        so it always names a whole namespace or a level within one;
+        anything else raises ValueError.
+        """
+        pass
+    
+    def stats(self) -> Dict[str, Any]:
+        return {}
+    
+    def close(self) -> None:
+        pass
 
 
 class CacheEntry:
-    def __init__(self, value: Any, expires_at: Optional[datetime] = None):
+    """One cached value. Times are time.monotonic() seconds."""
+    __slots__ = ("value", "expires_at", "created_at", "access_count", "tags")
+    
+    def __init__(
+        self,
+        value: Any,
+        expires_at: Optional[float] = None,
+        created_at: Optional[float] = None,
+        tags: Tuple[str, ...] = (),
+    ):
         self.value = value
         self.expires_at = expires_at
-        self.created_at = datetime.utcnow()
+        self.created_at = time.monotonic() if created_at is None else created_at
         self.access_count = 0
+        self.tags = tags
     
-    def is_expired(self) -> bool:
+    def is_expired(self, now: Optional[float] = None) -> bool:
         if self.expires_at is None:
             return False
-        return datetime.utcnow() > self.expires_at
+        return (time.monotonic() if now is None else now) >= self.expires_at
     
     def access(self) -> Any:
         self.access_count += 1
@@ -53,45 +103,98 @@ class CacheEntry:
 
 
 class MemoryCache(CacheBackend):
-    def __init__(self, max_size: int = 1000, default_ttl: int = 300):
-        self._cache: Dict[str, CacheEntry] = {}
+    """
+    In-process LRU cache.
+    
+    Entries are kept in access order, so get, set and eviction are all
+    O(1). Expiry times also go on a min-heap, which lets a full cache drop
+    an expired entry before evicting the least recently used live one, and
+    lets sweep() remove expired entries nobody reads. Heap items for keys
+    since deleted or overwritten are skipped when they surface.
+    
+    With ``sweep_interval`` > 0 a daemon thread sweeps every interval, in
+    batches of SWEEP_BATCH so the lock is never held for long.
+    
+    Two reverse indexes are kept in step with every insert and removal,
+    eviction and expiry included: tag -> keys, and namespace (the part of
+    a key before its first ":") -> keys. invalidate_tag touches only the
+    tagged keys; invalidate_prefix only the keys in the prefix's namespace.
+    """
+    
+    SWEEP_BATCH = 512
+    
+    def __init__(self, max_size: int = 1000, default_ttl: int = 300, sweep_interval: float = 0.0):
+        self._cache: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._tag_index: Dict[str, Set[str]] = {}
+        self._namespace_index: Dict[str, Set[str]] = {}
         self._max_size = max_size
         self._default_ttl = default_ttl
         self._lock = threading.RLock()
         self._hits = 0
         self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._sweeps = 0
+        self._sweep_seconds = 0.0
+        self._get_seconds = 0.0
+        self._sweeper_stop = threading.Event()
+        if sweep_interval > 0:
+            threading.Thread(
+                target=_sweep_loop,
+                args=(weakref.ref(self), sweep_interval, self._sweeper_stop),
+                name="cache-sweeper",
+                daemon=True,
+            ).start()
     
     def get(self, key: str) -> Optional[Any]:
+        started = time.perf_counter()
         with self._lock:
-            entry = self._cache.get(key)
-            if entry is None:
-                self._misses += 1
-                return None
-            if entry.is_expired():
-                del self._cache[key]
-                self._misses += 1
-                return None
-            self._hits += 1
-            return entry.access()
+            try:
+                entry = self._cache.get(key)
+                if entry is None:
+                    self._misses += 1
+                    return None
+                if entry.is_expired():
+                    self._remove(key)
+                    self._expirations += 1
+                    self._misses += 1
+                    return None
+                self._cache.move_to_end(key)
+                self._hits += 1
+                return entry.access()
+            finally:
+                self._get_seconds += time.perf_counter() - started
     
-    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
+    def set(self, key: str, value: Any, ttl: Optional[int] = None, tags: Iterable[str] = ()) -> bool:
+        now = time.monotonic()
+        tags = tuple(tags)
         with self._lock:
-            if len(self._cache) >= self._max_size:
-                self._evict_oldest()
+            previous = self._cache.get(key)
+            if previous is not None:
+                self._cache.move_to_end(key)
+                self._unindex_tags(key, previous.tags)
+            else:
+                if len(self._cache) >= self._max_size:
+                    self._evict(now)
+                self._namespace_index.setdefault(key.partition(":")[0], set()).add(key)
+            for tag in tags:
+                self._tag_index.setdefault(tag, set()).add(key)
             
-            expires_at = None
-            if ttl is not None:
-                expires_at = datetime.utcnow() + timedelta(seconds=ttl)
-            elif self._default_ttl > 0:
-                expires_at = datetime.utcnow() + timedelta(seconds=self._default_ttl)
+            ttl = self._default_ttl if ttl is None else ttl
+            expires_at = now + ttl if ttl > 0 else None
             
-            self._cache[key] = CacheEntry(value, expires_at)
+            self._cache[key] = CacheEntry(value, expires_at, now, tags)
+            if expires_at is not None:
+                heapq.heappush(self._expiry_heap, (expires_at, key))
+                if len(self._expiry_heap) > 2 * len(self._cache) + self.SWEEP_BATCH:
+                    self._rebuild_expiry_heap()
             return True
     
     def delete(self, key: str) -> bool:
         with self._lock:
             if key in self._cache:
-                del self._cache[key]
+                self._remove(key)
                 return True
             return False
     
@@ -101,15 +204,24 @@ class MemoryCache(CacheBackend):
             if entry is None:
                 return False
             if entry.is_expired():
-                del self._cache[key]
+                self._remove(key)
+                self._expirations += 1
                 return False
             return True
     
     def clear(self) -> None:
         with self._lock:
             self._cache.clear()
+            self._expiry_heap.clear()
+            self._tag_index.clear()
+            self._namespace_index.clear()
             self._hits = 0
             self._misses = 0
+            self._evictions = 0
+            self._expirations = 0
+            self._sweeps = 0
+            self._sweep_seconds = 0.0
+            self._get_seconds = 0.0
     
     def get_many(self, keys: list) -> Dict[str, Any]:
         result = {}
@@ -124,26 +236,323 @@ class MemoryCache(CacheBackend):
             self.set(key, value, ttl)
         return True
     
-    def _evict_oldest(self) -> None:
-        if not self._cache:
-            return
-        oldest_key = min(
-            self._cache.keys(),
-            key=lambda k: self._cache[k].created_at
-        )
-        del self._cache[oldest_key]
+    def _pop_expired(self, now: float, limit: int) -> int:
+        """Remove up to ``limit`` expired entries, soonest expiry first."""
+        heap = self._expiry_heap
+        removed = 0
+        while heap and heap[0][0] <= now and removed < limit:
+            expires_at, key = heapq.heappop(heap)
+            entry = self._cache.get(key)
+            if entry is not None and entry.expires_at == expires_at:
+                self._remove(key)
+                removed += 1
+        self._expirations += removed
+        return removed
+    
+    def _rebuild_expiry_heap(self) -> None:
+        self._expiry_heap = [
+            (entry.expires_at, key) for key, entry in self._cache.items()
+            if entry.expires_at is not None
+        ]
+        heapq.heapify(self._expiry_heap)
+    
+    def _evict(self, now: float) -> None:
+        if not self._pop_expired(now, 1) and self._cache:
+            self._remove(next(iter(self._cache)))
+            self._evictions += 1
+    
+    def _remove(self, key: str) -> None:
+        entry = self._cache.pop(key)
+        self._unindex_tags(key, entry.tags)
+        namespace = key.partition(":")[0]
+        keys = self._namespace_index.get(namespace)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._namespace_index[namespace]
+    
+    def _unindex_tags(self, key: str, tags: Tuple[str, ...]) -> None:
+        for tag in tags:
+            keys = self._tag_index.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tag_index[tag]
+    
+    def invalidate_tag(self, tag: str) -> int:
+        with self._lock:
+            keys = list(self._tag_index.get(tag, ()))
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+    
+    def invalidate_prefix(self, prefix: str) -> int:
+        _check_prefix(prefix)
+        with self._lock:
+            keys = [
+                key for key in self._namespace_index.get(prefix.partition(":")[0], ())
+                if key.startswith(prefix)
+            ]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+    
+    def sweep(self, limit: Optional[int] = None) -> int:
+        """Remove up to ``limit`` (default SWEEP_BATCH) expired entries."""
+        started = time.perf_counter()
+        with self._lock:
+            removed = self._pop_expired(time.monotonic(), limit or self.SWEEP_BATCH)
+            self._sweeps += 1
+            self._sweep_seconds += time.perf_counter() - started
+        return removed
+    
+    def sweep_all(self) -> int:
+        """Sweep batch by batch, releasing the lock in between, until done."""
+        total = 0
+        while True:
+            removed = self.sweep()
+            total += removed
+            if removed < self.SWEEP_BATCH:
+                return total
+    
+    def close(self) -> None:
+        self._sweeper_stop.set()
     
     def stats(self) -> Dict[str, Any]:
         with self._lock:
             total = self._hits + self._misses
             hit_rate = self._hits / total if total > 0 else 0
+            avg_get_us = self._get_seconds / total * 1e6 if total > 0 else 0
             return {
                 "size": len(self._cache),
                 "max_size": self._max_size,
                 "hits": self._hits,
                 "misses": self._misses,
                 "hit_rate": round(hit_rate, 4),
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "pending_expiries": len(self._expiry_heap),
+                "tags": len(self._tag_index),
+                "sweeps": self._sweeps,
+                "avg_sweep_us": round(self._sweep_seconds / self._sweeps * 1e6, 3) if self._sweeps else 0,
+                "avg_get_us": round(avg_get_us, 3),
             }
 
 
-cache = MemoryCache()
+def _sweep_loop(cache_ref: "weakref.ref[MemoryCache]", interval: float, stop: threading.Event) -> None:
+    # Holds only a weak reference between sweeps, so an unused cache can
+    # still be garbage collected; the thread exits when it is.
+    while not stop.wait(interval):
+        cache = cache_ref()
+        if cache is None:
+            return
+        cache.sweep_all()
+        del cache
+
+
+class RESPCache(CacheBackend):
+    """
+    Cache in a Redis-protocol server, shared by every worker and host.
+    
+    Values are pickled, so anything MemoryCache can hold works here too;
+    only point it at a server you trust. Keys are stored under ``prefix``
+    so clear() removes this cache's keys and nothing else. get_many is one
+    MGET and set_many one pipelined batch of SETs, each a single round
+    trip.
+    
+    Tags are server-side sets of keys, written in the same pipeline as the
+    value. Keys with a ttl go in a set that expires no earlier than its
+    longest-lived key (PEXPIRE NX and GT, Redis 7+); keys that never
+    expire go in a second set per tag that never expires either, so one
+    long-lived key cannot be dropped from its tag by another's ttl. The
+    server evicts keys without telling us, so a set may name keys already
+    gone, which only makes invalidation delete nothing for them.
+    invalidate_prefix uses KEYS, which scans the whole keyspace on the
+    server; prefer tags for hot paths. Like the RESP rate limit backend it
+    fails soft: if the server is unreachable, reads miss and writes are
+    dropped, and errors are counted
+    and logged.
+    """
+    
+    def __init__(
+        self,
+        url: str,
+        default_ttl: int = 300,
+        prefix: str = "cache:",
+        timeout: float = 0.25,
+        max_connections: int = 10,
+    ):
+        self._client = RESPClient(url, timeout=timeout, max_connections=max_connections)
+        self._default_ttl = default_ttl
+        self._prefix = prefix
+        self._hits = 0
+        self._misses = 0
+        self._errors = 0
+    
+    def _ttl_ms(self, ttl: Optional[int]) -> int:
+        ttl = self._default_ttl if ttl is None else ttl
+        return max(1, int(ttl * 1000)) if ttl > 0 else 0
+    
+    def _set_command(self, key: str, value: Any, ttl: Optional[int]) -> tuple:
+        ttl_ms = self._ttl_ms(ttl)
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if ttl_ms:
+            return ("SET", self._prefix + key, data, "PX", ttl_ms)
+        return ("SET", self._prefix + key, data)
+    
+    def _tag_keys(self, tag: str) -> tuple:
+        return f"{self._prefix}#tag:{tag}", f"{self._prefix}#ptag:{tag}"
+    
+    def _failed(self, operation: str, error: Exception) -> None:
+        self._errors += 1
+        logger.error(f"Cache backend {operation} failed: {error}")
+    
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            data = self._client.execute("GET", self._prefix + key)
+        except Exception as e:
+            self._failed("get", e)
+            data = None
+        if data is None:
+            self._misses += 1
+            return None
+        self._hits += 1
+        return pickle.loads(data)
+    
+    def set(self, key: str, value: Any, ttl: Optional[int] = None, tags: Iterable[str] = ()) -> bool:
+        commands = [self._set_command(key, value, ttl)]
+        ttl_ms = self._ttl_ms(ttl)
+        for tag in tags:
+            tag_key, persistent_key = self._tag_keys(tag)
+            if ttl_ms:
+                commands.append(("SADD", tag_key, self._prefix + key))
+                commands.append(("PEXPIRE", tag_key, ttl_ms, "NX"))
+                commands.append(("PEXPIRE", tag_key, ttl_ms, "GT"))
+            else:
+                commands.append(("SADD", persistent_key, self._prefix + key))
+        try:
+            replies = self._client.pipeline(commands)
+        except Exception as e:
+            self._failed("set", e)
+            return False
+        for reply in replies:
+            if isinstance(reply, RESPError):
+                self._failed("set", reply)
+        return replies[0] == "OK"
+    
+    def delete(self, key: str) -> bool:
+        try:
+            return self._client.execute("DEL", self._prefix + key) > 0
+        except Exception as e:
+            self._failed("delete", e)
+            return False
+    
+    def exists(self, key: str) -> bool:
+        try:
+            return self._client.execute("EXISTS", self._prefix + key) > 0
+        except Exception as e:
+            self._failed("exists", e)
+            return False
+    
+    def clear(self) -> None:
+        try:
+            keys = self._client.execute("KEYS", self._prefix + "*")
+            for start in range(0, len(keys), 1000):
+                self._client.execute("DEL", *keys[start:start + 1000])
+        except Exception as e:
+            self._failed("clear", e)
+        self._hits = 0
+        self._misses = 0
+    
+    def get_many(self, keys: list) -> Dict[str, Any]:
+        if not keys:
+            return {}
+        try:
+            values = self._client.execute("MGET", *(self._prefix + key for key in keys))
+        except Exception as e:
+            self._failed("get_many", e)
+            values = [None] * len(keys)
+        result = {key: pickle.loads(data) for key, data in zip(keys, values) if data is not None}
+        self._hits += len(result)
+        self._misses += len(keys) - len(result)
+        return result
+    
+    def set_many(self, mapping: Dict[str, Any], ttl: Optional[int] = None) -> bool:
+        if not mapping:
+            return True
+        try:
+            replies = self._client.pipeline([
+                self._set_command(key, value, ttl) for key, value in mapping.items()
+            ])
+        except Exception as e:
+            self._failed("set_many", e)
+            return False
+        return all(reply == "OK" for reply in replies)
+    
+    def _delete_keys(self, operation: str, keys: List[bytes], *extra: str) -> int:
+        if not keys and not extra:
+            return 0
+        commands = [("DEL", *keys)] if keys else []
+        if extra:
+            commands.append(("DEL", *extra))
+        try:
+            replies = self._client.pipeline(commands)
+        except Exception as e:
+            self._failed(operation, e)
+            return 0
+        return replies[0] if keys and isinstance(replies[0], int) else 0
+    
+    def invalidate_tag(self, tag: str) -> int:
+        tag_keys = self._tag_keys(tag)
+        try:
+            replies = self._client.pipeline([("SMEMBERS", tag_key) for tag_key in tag_keys])
+        except Exception as e:
+            self._failed("invalidate_tag", e)
+            return 0
+        keys = list({key for members in replies if isinstance(members, list) for key in members})
+        return self._delete_keys("invalidate_tag", keys, *tag_keys)
+    
+    def invalidate_prefix(self, prefix: str) -> int:
+        _check_prefix(prefix)
+        try:
+            keys = self._client.execute("KEYS", self._prefix + prefix + "*")
+        except Exception as e:
+            self._failed("invalidate_prefix", e)
+            return 0
+        return self._delete_keys("invalidate_prefix", keys)
+    
+    def close(self) -> None:
+        self._client.close()
+    
+    def stats(self) -> Dict[str, Any]:
+        total = self._hits + self._misses
+        return {
+            "backend": "resp",
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": round(self._hits / total, 4) if total > 0 else 0,
+            "errors": self._errors,
+            **self._client.stats(),
+        }
+
+
+def create_cache_backend(config: CacheSettings, prefix: str = "cache:") -> CacheBackend:
+    if config.backend == "memory":
+        return MemoryCache(
+            max_size=config.max_size,
+            default_ttl=config.default_ttl,
+            sweep_interval=config.sweep_interval,
+        )
+    if config.backend == "resp":
+        if not config.redis_url:
+            raise ValueError("Cache backend 'resp' requires a redis_url")
+        return RESPCache(
+            config.redis_url,
+            default_ttl=config.default_ttl,
+            prefix=prefix,
+            max_connections=config.redis_pool_size,
+        )
+    raise ValueError(f"Unknown cache backend: {config.backend}")
+
+
+cache = create_cache_backend(settings.cache)
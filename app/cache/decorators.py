@@ -1,9 +1,21 @@
+from concurrent.futures import ThreadPoolExecutor
 from functools import wraps
-from typing import Callable, Optional, Any
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Any, Set, Union
+import asyncio
 import hashlib
+import inspect
 import json
+import logging
+import math
+import random
+import threading
+import time
 
 from app.cache.backend import cache
+from app.cache.singleflight import single_flight
+from app.config.settings import settings
+
+logger = logging.getLogger(__name__)
 
 
 def _make_key(prefix: str, args: tuple, kwargs: dict) -> str:
@@ -19,16 +31,166 @@ def _make_key(prefix: str, args: tuple, kwargs: dict) -> str:
         key_parts.append(f"{k}={v}")
     
     key_string = ":".join(key_parts)
-    return hashlib.md5(key_string.encode()).hexdigest()
+    # The prefix stays readable so invalidate_prefix can find the key.
+    return f"{prefix}:{hashlib.md5(key_string.encode()).hexdigest()}"
+
+
+def _tag_builder(func: Callable, tags) -> Optional[Callable[..., Iterable[str]]]:
+    if tags is None or callable(tags):
+        return tags
+    templates = tuple(tags)
+    signature = inspect.signature(func)
+    
+    def build(*args, **kwargs) -> List[str]:
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        return [template.format(**bound.arguments) for template in templates]
+    
+    return build
+
+
+class StampedValue:
+    """
+    A cached value with the wall clock time it stops being fresh and how
+    long it took to compute, as stored by cached() with stale_ttl or
+    refresh_ahead. Wall clock time keeps it meaningful across workers
+    sharing a RESP cache.
+    """
+    __slots__ = ("value", "fresh_until", "delta")
+    
+    def __init__(self, value: Any, fresh_until: float, delta: float):
+        self.value = value
+        self.fresh_until = fresh_until
+        self.delta = delta
+    
+    def should_refresh(self, now: float, beta: float) -> bool:
+        if now >= self.fresh_until:
+            return True
+        # XFetch: refresh early with a probability that rises as expiry
+        # nears and with how long the value takes to recompute.
+        return beta > 0 and now - self.delta * beta * math.log(1.0 - random.random()) >= self.fresh_until
+
+
+class BackgroundRefresher:
+    """
+    Runs at most one background refresh per key at a time: on the running
+    event loop for async loaders, on a small thread pool for sync ones.
+    """
+    
+    def __init__(self, max_workers: int = 4):
+        self._lock = threading.Lock()
+        self._refreshing: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._stale_hits = 0
+        self._early_refreshes = 0
+        self._refreshes = 0
+        self._errors = 0
+    
+    def _claim(self, key: str, stale: bool) -> bool:
+        with self._lock:
+            if stale:
+                self._stale_hits += 1
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            self._refreshes += 1
+            if not stale:
+                self._early_refreshes += 1
+            return True
+    
+    def _release(self, key: str, error: Optional[BaseException]) -> None:
+        with self._lock:
+            self._refreshing.discard(key)
+            if error is not None:
+                self._errors += 1
+        if error is not None:
+            logger.warning(f"Background refresh of {key} failed: {error}")
+    
+    def refresh_async(self, key: str, load: Callable[[], Awaitable[Any]], stale: bool) -> None:
+        if not self._claim(key, stale):
+            return
+        task = asyncio.get_running_loop().create_task(single_flight.do_async(key, load))
+        self._tasks.add(task)
+        
+        def done(task: asyncio.Task) -> None:
+            self._tasks.discard(task)
+            self._release(key, None if task.cancelled() else task.exception())
+        
+        task.add_done_callback(done)
+    
+    def refresh_sync(self, key: str, load: Callable[[], Any], stale: bool) -> None:
+        if not self._claim(key, stale):
+            return
+        
+        def run() -> None:
+            try:
+                single_flight.do(key, load)
+            except Exception as e:
+                self._release(key, e)
+            else:
+                self._release(key, None)
+        
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self._max_workers, thread_name_prefix="cache-refresh")
+        self._executor.submit(run)
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "refreshing": len(self._refreshing),
+                "stale_hits": self._stale_hits,
+                "refreshes": self._refreshes,
+                "early_refreshes": self._early_refreshes,
+                "errors": self._errors,
+            }
+
+
+refresher = BackgroundRefresher()
 
 
 def cached(
     prefix: Optional[str] = None,
     ttl: Optional[int] = None,
     key_builder: Optional[Callable] = None,
+    stale_ttl: float = 0,
+    refresh_ahead: float = 0,
+    tags: Optional[Union[Iterable[str], Callable[..., Iterable[str]]]] = None,
 ):
+    """
+    Cache a function's results.
+    
+    ``tags`` attaches invalidation tags to each result: either a function
+    taking the call's arguments, or templates formatted with them by
+    parameter name, e.g. ``tags=["user:{user_id}"]``. Results can then be
+    dropped with invalidate_tag("user:42"), or all of a function's results
+    with invalidate_prefix(f"{prefix}:").
+    
+    ``stale_ttl`` keeps serving a value for that many seconds past ``ttl``
+    while one background call refreshes it. ``refresh_ahead`` is the XFetch
+    beta: above 0, each hit may start that refresh before ``ttl`` is up,
+    with a probability growing as expiry nears (1.0 is the usual choice,
+    larger refreshes earlier). Concurrent misses share one call either way.
+    """
+    stamped = stale_ttl > 0 or refresh_ahead > 0
+    
     def decorator(func: Callable) -> Callable:
         cache_prefix = prefix or f"{func.__module__}.{func.__name__}"
+        fresh_ttl = settings.cache.default_ttl if ttl is None else ttl
+        build_tags = _tag_builder(func, tags)
+        
+        def store(cache_key: str, result: Any, started: float, args: tuple, kwargs: dict) -> None:
+            entry_tags = build_tags(*args, **kwargs) if build_tags else ()
+            if stamped:
+                now = time.time()
+                cache.set(
+                    cache_key, StampedValue(result, now + fresh_ttl, now - started),
+                    fresh_ttl + stale_ttl, entry_tags,
+                )
+            else:
+                cache.set(cache_key, result, ttl, entry_tags)
         
         @wraps(func)
         async def async_wrapper(*args, **kwargs):
@@ -37,13 +199,22 @@ def cached(
             else:
                 cache_key = _make_key(cache_prefix, args, kwargs)
             
+            async def load():
+                started = time.time()
+                result = await func(*args, **kwargs)
+                store(cache_key, result, started, args, kwargs)
+                return result
+            
             cached_value = cache.get(cache_key)
             if cached_value is not None:
-                return cached_value
+                if not stamped:
+                    return cached_value
+                now = time.time()
+                if cached_value.should_refresh(now, refresh_ahead):
+                    refresher.refresh_async(cache_key, load, now >= cached_value.fresh_until)
+                return cached_value.value
             
-            result = await func(*args, **kwargs)
-            cache.set(cache_key, result, ttl)
-            return result
+            return await single_flight.do_async(cache_key, load)
         
         @wraps(func)
         def sync_wrapper(*args, **kwargs):
@@ -52,15 +223,23 @@ def cached(
             else:
                 cache_key = _make_key(cache_prefix, args, kwargs)
             
+            def load():
+                started = time.time()
+                result = func(*args, **kwargs)
+                store(cache_key, result, started, args, kwargs)
+                return result
+            
             cached_value = cache.get(cache_key)
             if cached_value is not None:
-                return cached_value
+                if not stamped:
+                    return cached_value
+                now = time.time()
+                if cached_value.should_refresh(now, refresh_ahead):
+                    refresher.refresh_sync(cache_key, load, now >= cached_value.fresh_until)
+                return cached_value.value
             
-            result = func(*args, **kwargs)
-            cache.set(cache_key, result, ttl)
-            return result
+            return single_flight.do(cache_key, load)
         
-        import asyncio
         if asyncio.iscoroutinefunction(func):
             return async_wrapper
         return sync_wrapper
@@ -85,16 +264,18 @@ def cache_aside(
     return None
 
 
+def invalidate_tag(tag: str) -> int:
+    return cache.invalidate_tag(tag)
+
+
+def invalidate_prefix(prefix: str) -> int:
+    return cache.invalidate_prefix(prefix)
+
+
 def invalidate_cache(pattern: str) -> int:
-    count = 0
-    keys_to_delete = []
-    
-    for key in list(cache._cache.keys()):
-        if pattern in key:
-            keys_to_delete.append(key)
-    
-    for key in keys_to_delete:
-        cache.delete(key)
-        count += 1
-    
-    return count
+    """
+    Delete keys matching ``pattern``, a key prefix ending in ":" with an
+    optional trailing "*", as built by CacheKey.invalidation_pattern.
+    Raises ValueError for any other pattern.
+    """
+    return cache.invalidate_prefix(pattern[:-1] if pattern.endswith("*") else pattern)
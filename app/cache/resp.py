@@ -0,0 +1,156 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+import socket
+import threading
+
+
+class RESPError(Exception):
+    """Error reply from the server."""
+    pass
+
+
+def encode_command(*args: Any) -> bytes:
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if isinstance(arg, bytes):
+            data = arg
+        else:
+            data = str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+def parse_url(url: str) -> Tuple[str, int, int]:
+    """(host, port, db) from a redis://host:port/db URL."""
+    parsed = urlparse(url)
+    db = int(parsed.path.lstrip("/") or 0)
+    return parsed.hostname or "localhost", parsed.port or 6379, db
+
+
+class RESPConnection:
+    """
+    A single blocking connection speaking the Redis serialization protocol.
+
+    Commands are written in one send and replies read back in order, so a
+    pipeline of N commands costs one round trip. Not thread-safe; callers
+    serialize access (see RESPClient).
+    """
+
+    def __init__(self, host: str, port: int, db: int = 0, timeout: float = 1.0):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._reader = None
+
+    def connect(self) -> None:
+        if self._sock is not None:
+            return
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._sock = sock
+        self._reader = sock.makefile("rb")
+        if self.db:
+            self.execute("SELECT", self.db)
+
+    def close(self) -> None:
+        if self._sock is not None:
+            try:
+                self._reader.close()
+                self._sock.close()
+            finally:
+                self._sock = None
+                self._reader = None
+
+    def execute(self, *args: Any) -> Any:
+        return self.pipeline([args])[0]
+
+    def pipeline(self, commands: Sequence[Sequence[Any]]) -> List[Any]:
+        """
+        Send every command, then read every reply. Error replies are
+        returned in place as RESPError instances rather than raised, so one
+        failed command does not desynchronize the rest.
+        """
+        self.connect()
+        try:
+            self._sock.sendall(b"".join(encode_command(*command) for command in commands))
+            return [self._read_reply() for _ in commands]
+        except (OSError, ValueError):
+            self.close()
+            raise
+
+    def _read_reply(self) -> Any:
+        line = self._reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("Connection closed by server")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode()
+        if kind == b"-":
+            return RESPError(payload.decode())
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = self._reader.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            length = int(payload)
+            if length < 0:
+                return None
+            return [self._read_reply() for _ in range(length)]
+        raise ValueError(f"Unknown RESP reply type: {line!r}")
+
+
+class RESPClient:
+    """
+    Thread-safe client over a pool of RESPConnections.
+
+    Each call borrows an idle connection, or opens one while fewer than
+    ``max_connections`` exist, and blocks for up to ``timeout`` otherwise.
+    A connection that fails mid-command is closed rather than returned,
+    since its reply stream can no longer be trusted.
+    """
+
+    def __init__(self, url: str, timeout: float = 1.0, max_connections: int = 10):
+        self._host, self._port, self._db = parse_url(url)
+        self._timeout = timeout
+        self._idle: List[RESPConnection] = []
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._lock = threading.Lock()
+        self.max_connections = max_connections
+
+    def execute(self, *args: Any) -> Any:
+        reply = self.pipeline([args])[0]
+        if isinstance(reply, RESPError):
+            raise reply
+        return reply
+
+    def pipeline(self, commands: Sequence[Sequence[Any]]) -> List[Any]:
+        if not self._slots.acquire(timeout=self._timeout):
+            raise ConnectionError("RESP connection pool exhausted")
+        try:
+            with self._lock:
+                connection = self._idle.pop() if self._idle else None
+            if connection is None:
+                connection = RESPConnection(self._host, self._port, self._db, self._timeout)
+            replies = connection.pipeline(commands)
+            with self._lock:
+                self._idle.append(connection)
+            return replies
+        finally:
+            self._slots.release()
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            idle = len(self._idle)
+        return {"max_connections": self.max_connections, "idle_connections": idle}
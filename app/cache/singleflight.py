@@ -0,0 +1,115 @@
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+import asyncio
+import threading
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent loads of the same key.
+
+    The first caller for a key becomes its leader and runs the loader;
+    callers arriving while it runs wait for the leader's result (or
+    exception) instead of running the loader again. Once the leader
+    finishes, the next call for the key starts a new flight.
+
+    Async flights are per event loop, since a future cannot be awaited
+    from another loop. Waiters shield the shared future, so cancelling one
+    waiter does not affect the others; if the leader itself is cancelled,
+    waiters retry and one of them leads.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._futures: Dict[Tuple[asyncio.AbstractEventLoop, Hashable], asyncio.Future] = {}
+        self._leaders = 0
+        self._coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._leaders += 1
+            else:
+                self._coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        loop = asyncio.get_running_loop()
+        flight = (loop, key)
+        while True:
+            future = self._futures.get(flight)
+            if future is None:
+                break
+            with self._lock:
+                self._coalesced += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if future.cancelled():
+                    continue
+                raise
+
+        future = loop.create_future()
+        self._futures[flight] = future
+        with self._lock:
+            self._leaders += 1
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark it retrieved so a flight without waiters is not reported
+            # as an unhandled exception.
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._futures[flight]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "in_flight": len(self._calls) + len(self._futures),
+                "leaders": self._leaders,
+                "coalesced": self._coalesced,
+            }
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._leaders = 0
+            self._coalesced = 0
+
+
+single_flight = SingleFlight()
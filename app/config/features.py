@@ -99,3 +99,4 @@ feature_flags.register("enhanced_logging", default=True)
 feature_flags.register("rate_limit_v2", default=False)
 feature_flags.register("webhook_retries", default=True)
 feature_flags.register("cache_warming", default=False)
+feature_flags.register("user_json_fast_path", default=False)
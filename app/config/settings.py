@@ -9,6 +9,7 @@ class DatabaseSettings(BaseModel):
     pool_min_size: int = 2
     pool_max_size: int = 10
     echo: bool = False
+    user_store: str = "memory"
 
 
 class AuthSettings(BaseModel):
@@ -16,20 +17,35 @@ class AuthSettings(BaseModel):
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
     refresh_token_expire_days: int = 7
+    revocation_store: str = "memory"
+    revocation_max_entries: int = 100000
+    password_hash_iterations: int = 100000
+    password_hash_target_ms: float = 0
+    password_hash_workers: int = 4
+    password_hash_queue_limit: int = 64
 
 
 class CacheSettings(BaseModel):
     enabled: bool = True
     default_ttl: int = 300
     max_size: int = 1000
+    sweep_interval: float = 1.0
     backend: str = "memory"
     redis_url: Optional[str] = None
+    redis_pool_size: int = 10
 
 
 class RateLimitSettings(BaseModel):
     enabled: bool = True
     requests_per_minute: int = 60
     burst_size: int = 10
+    strategy: str = "sliding_log"
+    max_clients: int = 100000
+    idle_ttl: float = 300.0
+    shards: int = 16
+    backend: str = "memory"
+    shared_path: str = ""
+    redis_url: Optional[str] = None
 
 
 class CorsSettings(BaseModel):
@@ -82,21 +98,40 @@ def load_settings_from_env() -> Settings:
             pool_min_size=int(os.getenv("DATABASE_POOL_MIN", "2")),
             pool_max_size=int(os.getenv("DATABASE_POOL_MAX", "10")),
             echo=os.getenv("DATABASE_ECHO", "false").lower() == "true",
+            user_store=os.getenv("USER_STORE", "memory"),
         ),
         auth=AuthSettings(
             secret_key=os.getenv("JWT_SECRET", "dev-secret-change-in-production"),
             algorithm=os.getenv("JWT_ALGORITHM", "HS256"),
             access_token_expire_minutes=int(os.getenv("JWT_EXPIRE_MINUTES", "30")),
+            refresh_token_expire_days=int(os.getenv("JWT_REFRESH_EXPIRE_DAYS", "7")),
+            revocation_store=os.getenv("REVOCATION_STORE", "memory"),
+            revocation_max_entries=int(os.getenv("REVOCATION_MAX_ENTRIES", "100000")),
+            password_hash_iterations=int(os.getenv("PASSWORD_HASH_ITERATIONS", "100000")),
+            password_hash_target_ms=float(os.getenv("PASSWORD_HASH_TARGET_MS", "0")),
+            password_hash_workers=int(os.getenv("PASSWORD_HASH_WORKERS", "4")),
+            password_hash_queue_limit=int(os.getenv("PASSWORD_HASH_QUEUE_LIMIT", "64")),
         ),
         cache=CacheSettings(
             enabled=os.getenv("CACHE_ENABLED", "true").lower() == "true",
             default_ttl=int(os.getenv("CACHE_TTL", "300")),
             max_size=int(os.getenv("CACHE_MAX_SIZE", "1000")),
-            redis_url=os.getenv("REDIS_URL"),
+            sweep_interval=float(os.getenv("CACHE_SWEEP_INTERVAL", "1")),
+            backend=os.getenv("CACHE_BACKEND", "memory"),
+            redis_url=os.getenv("CACHE_REDIS_URL", os.getenv("REDIS_URL")),
+            redis_pool_size=int(os.getenv("CACHE_REDIS_POOL_SIZE", "10")),
         ),
         rate_limit=RateLimitSettings(
             enabled=os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true",
             requests_per_minute=int(os.getenv("RATE_LIMIT_RPM", "60")),
+            burst_size=int(os.getenv("RATE_LIMIT_BURST", "10")),
+            strategy=os.getenv("RATE_LIMIT_STRATEGY", "sliding_log"),
+            max_clients=int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "100000")),
+            idle_ttl=float(os.getenv("RATE_LIMIT_IDLE_TTL", "300")),
+            shards=int(os.getenv("RATE_LIMIT_SHARDS", "16")),
+            backend=os.getenv("RATE_LIMIT_BACKEND", "memory"),
+            shared_path=os.getenv("RATE_LIMIT_SHARED_PATH", ""),
+            redis_url=os.getenv("RATE_LIMIT_REDIS_URL", os.getenv("REDIS_URL")),
         ),
     )
 
@@ -16,7 +16,8 @@ class DatabaseConnection:
         if self._connection is None:
             self._connection = sqlite3.connect(
                 self.connection_string,
-                check_same_thread=False
+                check_same_thread=False,
+                uri=self.connection_string.startswith("file:"),
             )
             self._connection.row_factory = sqlite3.Row
     
@@ -140,5 +141,26 @@ db_pool = ConnectionPool(
 )
 
 
+def require_shared_database() -> None:
+    """
+    Raise ValueError unless every pooled connection opens the same database.
+
+    A plain ":memory:" (or empty) DATABASE_URL gives each connection its
+    own private, empty database, so rows written through one connection
+    are invisible to the next.
+    """
+    url = db_pool.connection_string
+    private = url in ("", ":memory:") or (
+        url.startswith("file:")
+        and (url.startswith("file::memory:") or "mode=memory" in url)
+        and "cache=shared" not in url
+    )
+    if private:
+        raise ValueError(
+            f"DATABASE_URL={url!r} is private to each connection; use a file path "
+            "or a shared-cache URI such as 'file:app?mode=memory&cache=shared'"
+        )
+
+
 def get_db() -> DatabaseConnection:
     return db_pool.acquire()
@@ -2,11 +2,14 @@ from typing import List, Optional, Callable
 from datetime import datetime
 from dataclasses import dataclass
 import logging
+import re
 
 from app.database.connection import DatabaseConnection, db_pool
 
 logger = logging.getLogger(__name__)
 
+_ADD_COLUMN = re.compile(r"^\s*ALTER\s+TABLE\s+(\w+)\s+ADD\s+COLUMN\s+(\w+)", re.IGNORECASE)
+
 
 @dataclass
 class Migration:
@@ -55,15 +58,30 @@ class MigrationRunner:
         return [m for m in self._migrations if m.version not in applied]
     
     def migrate(self) -> List[str]:
+        """
+        Apply pending migrations. Each one runs in a BEGIN IMMEDIATE
+        transaction, which holds SQLite's write lock, and is skipped if
+        another process recorded it while this one waited for the lock, so
+        workers starting together on one database apply it exactly once.
+        """
         applied = []
         pending = self.get_pending_migrations()
         
         for migration in pending:
-            logger.info(f"Applying migration {migration.version}: {migration.name}")
-            
             with db_pool.connection() as conn:
                 try:
-                    conn.execute(migration.up)
+                    conn.execute("BEGIN IMMEDIATE")
+                    recorded = conn.execute(
+                        f"SELECT 1 FROM {self.MIGRATIONS_TABLE} WHERE version = ?",
+                        (migration.version,)
+                    ).fetchone()
+                    if recorded:
+                        conn.rollback()
+                        continue
+                    
+                    logger.info(f"Applying migration {migration.version}: {migration.name}")
+                    if not self._column_exists(conn, migration.up):
+                        conn.execute(migration.up)
                     conn.execute(
                         f"INSERT INTO {self.MIGRATIONS_TABLE} (version, name) VALUES (?, ?)",
                         (migration.version, migration.name)
@@ -78,6 +96,16 @@ class MigrationRunner:
         
         return applied
     
+    @staticmethod
+    def _column_exists(conn: DatabaseConnection, statement: str) -> bool:
+        """True if statement adds a column that is already there."""
+        match = _ADD_COLUMN.match(statement)
+        if not match:
+            return False
+        table, column = match.groups()
+        rows = conn.execute(f"PRAGMA table_info({table})").fetchall()
+        return any(row[1] == column for row in rows)
+    
     def rollback(self, steps: int = 1) -> List[str]:
         rolled_back = []
         applied = self.get_applied_versions()
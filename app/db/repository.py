@@ -0,0 +1,386 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from datetime import datetime
+import sqlite3
+
+from app.database.connection import db_pool, require_shared_database
+from app.database.migrations import Migration, migration_runner
+from app.database.repository import BaseRepository
+from app.db.search import tokenize
+from app.db.users import DuplicateEmailError, UserStore, normalize_email
+from app.models import User, UserCreate
+
+USER_MIGRATIONS = [
+    Migration(
+        version="0001",
+        name="create_users_table",
+        up="""
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                email TEXT NOT NULL COLLATE NOCASE,
+                name TEXT NOT NULL,
+                created_at TIMESTAMP NOT NULL,
+                is_active INTEGER NOT NULL DEFAULT 1
+            )
+        """,
+        down="DROP TABLE IF EXISTS users",
+    ),
+    Migration(
+        version="0002",
+        name="create_users_email_index",
+        up="CREATE UNIQUE INDEX IF NOT EXISTS idx_users_email ON users (email)",
+        down="DROP INDEX IF EXISTS idx_users_email",
+    ),
+    Migration(
+        version="0003",
+        name="create_users_created_at_index",
+        up="CREATE INDEX IF NOT EXISTS idx_users_created_at ON users (created_at)",
+        down="DROP INDEX IF EXISTS idx_users_created_at",
+    ),
+    Migration(
+        version="0004",
+        name="add_users_version_column",
+        up="ALTER TABLE users ADD COLUMN version INTEGER NOT NULL DEFAULT 1",
+        down="ALTER TABLE users DROP COLUMN version",
+    ),
+    Migration(
+        version="0005",
+        name="create_users_meta_table",
+        up="""
+            CREATE TABLE IF NOT EXISTS users_meta (
+                key TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            )
+        """,
+        down="DROP TABLE IF EXISTS users_meta",
+    ),
+    Migration(
+        version="0006",
+        name="create_users_fts_table",
+        up="""
+            CREATE VIRTUAL TABLE IF NOT EXISTS users_fts USING fts5(
+                name, email, content='users', content_rowid='id', prefix='2 3'
+            )
+        """,
+        down="DROP TABLE IF EXISTS users_fts",
+    ),
+    Migration(
+        version="0007",
+        name="create_users_fts_insert_trigger",
+        up="""
+            CREATE TRIGGER IF NOT EXISTS users_fts_insert AFTER INSERT ON users BEGIN
+                INSERT INTO users_fts (rowid, name, email) VALUES (new.id, new.name, new.email);
+            END
+        """,
+        down="DROP TRIGGER IF EXISTS users_fts_insert",
+    ),
+    Migration(
+        version="0008",
+        name="create_users_fts_delete_trigger",
+        up="""
+            CREATE TRIGGER IF NOT EXISTS users_fts_delete AFTER DELETE ON users BEGIN
+                INSERT INTO users_fts (users_fts, rowid, name, email)
+                VALUES ('delete', old.id, old.name, old.email);
+            END
+        """,
+        down="DROP TRIGGER IF EXISTS users_fts_delete",
+    ),
+    Migration(
+        version="0009",
+        name="create_users_fts_update_trigger",
+        up="""
+            CREATE TRIGGER IF NOT EXISTS users_fts_update AFTER UPDATE OF name, email ON users BEGIN
+                INSERT INTO users_fts (users_fts, rowid, name, email)
+                VALUES ('delete', old.id, old.name, old.email);
+                INSERT INTO users_fts (rowid, name, email) VALUES (new.id, new.name, new.email);
+            END
+        """,
+        down="DROP TRIGGER IF EXISTS users_fts_update",
+    ),
+    Migration(
+        version="0010",
+        name="rebuild_users_fts_index",
+        up="INSERT INTO users_fts (users_fts) VALUES ('rebuild')",
+        down="INSERT INTO users_fts (users_fts) VALUES ('delete-all')",
+    ),
+    Migration(
+        version="0013",
+        name="add_users_password_hash_column",
+        up="ALTER TABLE users ADD COLUMN password_hash TEXT",
+        down="ALTER TABLE users DROP COLUMN password_hash",
+    ),
+    Migration(
+        version="0014",
+        name="normalize_users_email",
+        # Rows that would collide once normalized are left as they are.
+        up="UPDATE OR IGNORE users SET email = lower(trim(email, ' \t\n\r'))",
+        down="SELECT 1",
+    ),
+]
+
+for _migration in USER_MIGRATIONS:
+    migration_runner.register(_migration)
+
+
+class UserRepository(BaseRepository[User], UserStore):
+    """
+    SQLite-backed user store sharing the UserStore interface with UserDB.
+
+    Email uniqueness is enforced by a NOCASE unique index, so lookups by
+    email and duplicate detection are both index operations. Point
+    DATABASE_URL at a file (or a shared-cache ``file:`` URI) so every pooled
+    connection and every worker sees the same table.
+
+    Each row carries a ``version`` column bumped on update, and every write
+    bumps a collection counter in ``users_meta`` inside the same
+    transaction, so versions are consistent across workers.
+    """
+
+    table_name = "users"
+    BATCH_SIZE = 500
+
+    def __init__(self):
+        BaseRepository.__init__(self)
+        UserStore.__init__(self)
+        require_shared_database()
+        migration_runner.migrate()
+        with db_pool.connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+
+    def _row_to_entity(self, row: Dict[str, Any]) -> User:
+        return User(**row)
+
+    def _entity_to_row(self, entity: UserCreate) -> Dict[str, Any]:
+        return {
+            "email": normalize_email(entity.email),
+            "name": entity.name,
+            "created_at": datetime.utcnow().isoformat(),
+            "is_active": 1,
+        }
+
+    def get_all(self) -> List[User]:
+        with db_pool.connection() as conn:
+            cursor = conn.execute(f"SELECT * FROM {self.table_name} ORDER BY id")
+            return [self._row_to_entity(dict(row)) for row in cursor.fetchall()]
+
+    def list_after(self, after_id: int = 0, limit: int = 100) -> List[User]:
+        with db_pool.connection() as conn:
+            cursor = conn.execute(
+                f"SELECT * FROM {self.table_name} WHERE id > ? ORDER BY id LIMIT ?",
+                (after_id, limit)
+            )
+            return [self._row_to_entity(dict(row)) for row in cursor.fetchall()]
+
+    def get_by_id(self, user_id: int) -> Optional[User]:
+        return self.find_by_id(user_id)
+
+    def get_many(self, user_ids: Iterable[int]) -> Dict[int, User]:
+        user_ids = list(dict.fromkeys(user_ids))
+        result: Dict[int, User] = {}
+        with db_pool.connection() as conn:
+            for start in range(0, len(user_ids), self.BATCH_SIZE):
+                batch = user_ids[start:start + self.BATCH_SIZE]
+                cursor = conn.execute(
+                    f"SELECT * FROM {self.table_name} WHERE id IN ({self._placeholders(batch)})",
+                    tuple(batch)
+                )
+                for row in cursor.fetchall():
+                    user = self._row_to_entity(dict(row))
+                    result[user.id] = user
+        return result
+
+    def get_by_email(self, email: str) -> Optional[User]:
+        return self.find_one_by(email=normalize_email(email))
+
+    def create(self, user_data: UserCreate) -> User:
+        row = self._entity_to_row(user_data)
+        columns_sql = ", ".join(row.keys())
+        placeholders = ", ".join(["?" for _ in row])
+
+        with db_pool.connection() as conn:
+            try:
+                with conn.transaction():
+                    cursor = conn.execute(
+                        f"INSERT INTO {self.table_name} ({columns_sql}) VALUES ({placeholders})",
+                        tuple(row.values())
+                    )
+                    self._bump_collection_version(conn)
+            except sqlite3.IntegrityError:
+                raise DuplicateEmailError(user_data.email)
+
+        user = self.find_by_id(cursor.lastrowid)
+        self._notify(user.id)
+        return user
+
+    def create_many(self, users: List[UserCreate]) -> List[Optional[User]]:
+        """
+        Insert a batch with a single executemany inside one transaction.
+
+        Emails already present in the table or repeated within the batch
+        are filtered out up front and reported as None. If a concurrent
+        writer still trips the unique index, the batch falls back to
+        per-row inserts so only the conflicting rows are dropped. Large
+        inputs are split into BATCH_SIZE slices to stay under SQLite's
+        bound-parameter limit.
+        """
+        if len(users) > self.BATCH_SIZE:
+            results: List[Optional[User]] = []
+            for start in range(0, len(users), self.BATCH_SIZE):
+                results.extend(self.create_many(users[start:start + self.BATCH_SIZE]))
+            return results
+
+        pending: Dict[str, int] = {}
+        for index, user_data in enumerate(users):
+            pending.setdefault(normalize_email(user_data.email), index)
+
+        with db_pool.connection() as conn:
+            if pending:
+                cursor = conn.execute(
+                    f"SELECT email FROM {self.table_name} WHERE email IN ({self._placeholders(pending)})",
+                    tuple(pending.keys())
+                )
+                for row in cursor.fetchall():
+                    pending.pop(normalize_email(row["email"]), None)
+
+            if not pending:
+                return [None] * len(users)
+
+            rows = [self._entity_to_row(users[index]) for index in pending.values()]
+            columns_sql = ", ".join(rows[0].keys())
+            try:
+                with conn.transaction():
+                    conn.executemany(
+                        f"INSERT INTO {self.table_name} ({columns_sql}) VALUES ({self._placeholders(rows[0])})",
+                        [tuple(row.values()) for row in rows]
+                    )
+                    self._bump_collection_version(conn)
+                    cursor = conn.execute(
+                        f"SELECT * FROM {self.table_name} WHERE email IN ({self._placeholders(pending)})",
+                        tuple(pending.keys())
+                    )
+                    created = {
+                        normalize_email(row["email"]): self._row_to_entity(dict(row))
+                        for row in cursor.fetchall()
+                    }
+            except sqlite3.IntegrityError:
+                created = None
+
+        if created is None:
+            return super().create_many(users)
+
+        results: List[Optional[User]] = [None] * len(users)
+        for key, index in pending.items():
+            results[index] = created.get(key)
+            if results[index] is not None:
+                self._notify(results[index].id)
+        return results
+
+    @staticmethod
+    def _placeholders(values) -> str:
+        return ", ".join(["?" for _ in values])
+
+    def update(self, user_id: int, updates: Dict[str, Any]) -> Optional[User]:
+        if not updates:
+            return self.find_by_id(user_id)
+
+        if "email" in updates:
+            updates = {**updates, "email": normalize_email(updates["email"])}
+        set_sql = ", ".join(f"{key} = ?" for key in updates)
+
+        with db_pool.connection() as conn:
+            try:
+                with conn.transaction():
+                    cursor = conn.execute(
+                        f"UPDATE {self.table_name} SET {set_sql}, version = version + 1 WHERE id = ?",
+                        (*updates.values(), user_id)
+                    )
+                    if cursor.rowcount:
+                        self._bump_collection_version(conn)
+            except sqlite3.IntegrityError:
+                raise DuplicateEmailError(updates.get("email", ""))
+
+        self._notify(user_id)
+        return self.find_by_id(user_id)
+
+    def delete(self, user_id: int) -> bool:
+        with db_pool.connection() as conn:
+            with conn.transaction():
+                cursor = conn.execute(
+                    f"DELETE FROM {self.table_name} WHERE id = ?",
+                    (user_id,)
+                )
+                deleted = cursor.rowcount > 0
+                if deleted:
+                    self._bump_collection_version(conn)
+
+        if deleted:
+            self._notify(user_id)
+        return deleted
+
+    def get_password_hash(self, user_id: int) -> Optional[str]:
+        with db_pool.connection() as conn:
+            row = conn.execute(
+                f"SELECT password_hash FROM {self.table_name} WHERE id = ?",
+                (user_id,)
+            ).fetchone()
+            return row[0] if row else None
+
+    def set_password_hash(self, user_id: int, password_hash: str) -> bool:
+        # Not a change to the user's public fields, so neither version moves.
+        with db_pool.connection() as conn:
+            with conn.transaction():
+                cursor = conn.execute(
+                    f"UPDATE {self.table_name} SET password_hash = ? WHERE id = ?",
+                    (password_hash, user_id)
+                )
+                return cursor.rowcount > 0
+
+    def get_version(self, user_id: int) -> Optional[int]:
+        with db_pool.connection() as conn:
+            row = conn.execute(
+                f"SELECT version FROM {self.table_name} WHERE id = ?",
+                (user_id,)
+            ).fetchone()
+            return row[0] if row else None
+
+    def collection_version(self) -> int:
+        with db_pool.connection() as conn:
+            row = conn.execute(
+                "SELECT value FROM users_meta WHERE key = 'version'"
+            ).fetchone()
+            return row[0] if row else 0
+
+    def search(self, query: str, limit: int = 20, offset: int = 0) -> List[User]:
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        # Each term becomes a quoted prefix query so user input cannot
+        # inject FTS5 operators; bm25 weights name hits over email hits.
+        match = " ".join(f'"{term}"*' for term in terms)
+        with db_pool.connection() as conn:
+            cursor = conn.execute(
+                f"""
+                SELECT {self.table_name}.* FROM users_fts
+                JOIN {self.table_name} ON {self.table_name}.id = users_fts.rowid
+                WHERE users_fts MATCH ?
+                ORDER BY bm25(users_fts, 2.0, 1.0), {self.table_name}.id
+                LIMIT ? OFFSET ?
+                """,
+                (match, limit, offset)
+            )
+            return [self._row_to_entity(dict(row)) for row in cursor.fetchall()]
+
+    def list_versions_after(self, after_id: int = 0, limit: int = 100) -> List[Tuple[int, int]]:
+        with db_pool.connection() as conn:
+            cursor = conn.execute(
+                f"SELECT id, version FROM {self.table_name} WHERE id > ? ORDER BY id LIMIT ?",
+                (after_id, limit)
+            )
+            return [(row[0], row[1]) for row in cursor.fetchall()]
+
+    @staticmethod
+    def _bump_collection_version(conn) -> None:
+        conn.execute(
+            "INSERT INTO users_meta (key, value) VALUES ('version', 1) "
+            "ON CONFLICT (key) DO UPDATE SET value = value + 1"
+        )
@@ -0,0 +1,116 @@
+from typing import Optional
+import threading
+import time
+
+from app.auth.revocation import RevocationStore, _now
+from app.database.connection import db_pool, require_shared_database
+from app.database.migrations import Migration, migration_runner
+
+REVOCATION_MIGRATIONS = [
+    Migration(
+        version="0011",
+        name="create_revoked_tokens_table",
+        up="""
+            CREATE TABLE IF NOT EXISTS revoked_tokens (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                jti TEXT NOT NULL UNIQUE,
+                expires_at REAL NOT NULL
+            )
+        """,
+        down="DROP TABLE IF EXISTS revoked_tokens",
+    ),
+    Migration(
+        version="0012",
+        name="create_revoked_tokens_expires_at_index",
+        up="CREATE INDEX IF NOT EXISTS idx_revoked_tokens_expires_at ON revoked_tokens (expires_at)",
+        down="DROP INDEX IF EXISTS idx_revoked_tokens_expires_at",
+    ),
+]
+
+for _migration in REVOCATION_MIGRATIONS:
+    migration_runner.register(_migration)
+
+
+class SQLiteRevocationStore(RevocationStore):
+    """
+    Revocation store persisted to the ``revoked_tokens`` table.
+
+    Checks are still served from memory. New rows written by other workers
+    are pulled in at most every SYNC_INTERVAL seconds, so a revocation takes
+    up to that long to reach other workers. The unique jti column makes
+    revoke() atomic across workers, which refresh token rotation relies on.
+
+    The table is the source of truth and is never capped. Revocations that
+    do not fit in memory stay only in the table; until the last of them
+    expires, ids missing from memory are looked up there.
+    """
+
+    SYNC_INTERVAL = 1.0
+
+    def __init__(self, max_entries: int = 100000):
+        super().__init__(max_entries)
+        self._last_seq = 0
+        self._next_sync = 0.0
+        self._sync_lock = threading.Lock()
+        # Latest expiry among revocations held only in the table.
+        self._spilled_until = 0.0
+        require_shared_database()
+        migration_runner.migrate()
+        with db_pool.connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+        self.sync()
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        if time.monotonic() >= self._next_sync:
+            self.sync()
+        if super().is_revoked(jti):
+            return True
+        if jti is None or self._spilled_until <= _now():
+            return False
+        with db_pool.connection() as conn:
+            row = conn.execute(
+                "SELECT 1 FROM revoked_tokens WHERE jti = ? AND expires_at > ?",
+                (jti, _now())
+            ).fetchone()
+        return row is not None
+
+    def _remember(self, jti: str, expires_at: float) -> None:
+        """Caller holds self._lock."""
+        if jti not in self._revoked and not self._add(jti, expires_at):
+            self._spilled_until = max(self._spilled_until, expires_at)
+
+    def revoke(self, jti: str, expires_at: float) -> bool:
+        with db_pool.connection() as conn:
+            with conn.transaction():
+                conn.execute("DELETE FROM revoked_tokens WHERE expires_at <= ?", (_now(),))
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO revoked_tokens (jti, expires_at) VALUES (?, ?)",
+                    (jti, expires_at)
+                )
+                inserted = cursor.rowcount == 1
+
+        with self._lock:
+            self._remember(jti, expires_at)
+        return inserted
+
+    def sync(self) -> None:
+        if not self._sync_lock.acquire(blocking=False):
+            return
+        try:
+            self._next_sync = time.monotonic() + self.SYNC_INTERVAL
+            with db_pool.connection() as conn:
+                rows = conn.execute(
+                    "SELECT seq, jti, expires_at FROM revoked_tokens WHERE seq > ? ORDER BY seq",
+                    (self._last_seq,)
+                ).fetchall()
+            if not rows:
+                return
+
+            now = _now()
+            with self._lock:
+                for row in rows:
+                    if row["expires_at"] > now:
+                        self._remember(row["jti"], row["expires_at"])
+            self._last_seq = rows[-1]["seq"]
+        finally:
+            self._sync_lock.release()
@@ -0,0 +1,225 @@
+from itertools import groupby
+from typing import Dict, Iterator, List, Optional, Tuple
+import bisect
+import heapq
+import re
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens; splits emails on '.', '@', '+' and the like."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+class TokenIndex:
+    """
+    Inverted index from token to user ids with prefix expansion.
+
+    Postings are insertion-ordered dicts used as ordered sets: ids are
+    allocated monotonically, so they iterate in (near) id order and still
+    give O(1) membership checks.
+
+    Distinct tokens are kept in a large sorted list plus a small sorted
+    overflow list. New tokens are insorted into the overflow, which is
+    merged into the main list once it outgrows MERGE_THRESHOLD or 1/64th of
+    the main list, so inserts stay cheap at millions of tokens while prefix
+    lookups remain two bisects. Tokens whose postings empty out stay in the
+    lists until enough of them accumulate to be worth compacting.
+    """
+
+    MERGE_THRESHOLD = 1024
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[int, None]] = {}
+        self._tokens: List[str] = []
+        self._overflow: List[str] = []
+        self._stale = 0
+
+    def add(self, user_id: int, text: str) -> None:
+        for token in set(tokenize(text)):
+            ids = self._postings.get(token)
+            if ids is None:
+                self._postings[token] = {user_id: None}
+                self._insert_token(token)
+            else:
+                ids[user_id] = None
+
+    def remove(self, user_id: int, text: str) -> None:
+        for token in set(tokenize(text)):
+            ids = self._postings.get(token)
+            if ids is not None:
+                ids.pop(user_id, None)
+                if not ids:
+                    del self._postings[token]
+                    self._stale += 1
+
+    def expand(self, prefix: str, max_tokens: Optional[int] = None) -> List[Tuple[str, Dict[int, None]]]:
+        """Up to max_tokens (all if None) (token, ids) pairs starting with prefix, in token order."""
+        matches = heapq.merge(self._range(self._tokens, prefix), self._range(self._overflow, prefix))
+        result: List[Tuple[str, Dict[int, None]]] = []
+        previous = None
+        for token in matches:
+            if token == previous:
+                continue
+            previous = token
+            # Emptied tokens stay listed until the next compaction; skip
+            # them so they never count against max_tokens.
+            ids = self._postings.get(token)
+            if ids:
+                result.append((token, ids))
+                if max_tokens is not None and len(result) >= max_tokens:
+                    break
+        return result
+
+    @staticmethod
+    def _range(tokens: List[str], prefix: str) -> Iterator[str]:
+        for position in range(bisect.bisect_left(tokens, prefix), len(tokens)):
+            token = tokens[position]
+            if not token.startswith(prefix):
+                return
+            yield token
+
+    def _insert_token(self, token: str) -> None:
+        for tokens in (self._tokens, self._overflow):
+            position = bisect.bisect_left(tokens, token)
+            if position < len(tokens) and tokens[position] == token:
+                self._stale -= 1
+                return
+
+        bisect.insort(self._overflow, token)
+        if len(self._overflow) > max(self.MERGE_THRESHOLD, len(self._tokens) >> 6):
+            self._merge()
+
+    def _merge(self) -> None:
+        # sorted() on two sorted runs is a linear merge in C.
+        merged = sorted(self._tokens + self._overflow)
+        if self._stale > len(merged) >> 2:
+            postings = self._postings
+            merged = [token for token in merged if token in postings]
+            self._stale = 0
+        self._tokens = merged
+        self._overflow = []
+
+
+class PrefixIndex:
+    """
+    Ranked prefix search over user names and emails.
+
+    Every query term must match (as a prefix) a token of the name or the
+    email. A term scores NAME_WEIGHT for a name hit and EMAIL_WEIGHT for an
+    email hit, doubled when the token matches the term exactly; results are
+    ordered by total score, then id.
+
+    Terms matching at most MAX_EXPANSIONS tokens per field are scored from
+    their postings; broader terms are scored against each candidate's own
+    tokens instead, so no match is lost to the cap. Candidates are drawn
+    from the most selective of the narrow terms or, when every term is
+    broad, from the longest one expanded in full. Ranking happens over the
+    first WINDOW matches (or offset + limit, if larger), drawn in score
+    order of the driving term: exact name tokens first, then name
+    prefixes, exact email tokens and email prefixes, each tier in id order.
+    Single-term queries therefore rank exactly like a full scan; for broad
+    multi-term queries the window holds the best matches of the
+    driving term.
+    """
+
+    NAME_WEIGHT = 2
+    EMAIL_WEIGHT = 1
+    MAX_EXPANSIONS = 64
+    WINDOW = 200
+
+    def __init__(self):
+        self._name = TokenIndex()
+        self._email = TokenIndex()
+        self._tokens: Dict[int, Tuple[Tuple[str, ...], Tuple[str, ...]]] = {}
+
+    def add(self, user_id: int, name: str, email: str) -> None:
+        self._name.add(user_id, name)
+        self._email.add(user_id, email)
+        self._tokens[user_id] = (tuple(set(tokenize(name))), tuple(set(tokenize(email))))
+
+    def remove(self, user_id: int, name: str, email: str) -> None:
+        self._name.remove(user_id, name)
+        self._email.remove(user_id, email)
+        self._tokens.pop(user_id, None)
+
+    def search(self, query: str, limit: int = 20, offset: int = 0) -> List[int]:
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+
+        # Terms matching few tokens are scored from their postings; broader
+        # ones (None) from the candidate's own tokens.
+        expansions = [self._expand(term, self.MAX_EXPANSIONS) for term in terms]
+        if any(postings == [] for postings in expansions):
+            return []
+        bounded = [postings for postings in expansions if postings is not None]
+        if bounded:
+            driver = min(bounded, key=lambda postings: sum(len(ids) for ids, _, _ in postings))
+        else:
+            driver = self._expand(max(terms, key=len))
+
+        window = max(self.WINDOW, offset + limit)
+        matches: List[Tuple[int, int]] = []
+        seen = set()
+        for user_id in self._candidates(driver):
+            if user_id in seen:
+                continue
+            seen.add(user_id)
+
+            total = 0
+            for term, postings in zip(terms, expansions):
+                if postings is None:
+                    best = self._score(term, *self._tokens[user_id])
+                else:
+                    best = 0
+                    for ids, score, _ in postings:
+                        if score > best and user_id in ids:
+                            best = score
+                if not best:
+                    break
+                total += best
+            else:
+                matches.append((user_id, total))
+                if len(matches) >= window:
+                    break
+
+        matches.sort(key=lambda item: (-item[1], item[0]))
+        return [user_id for user_id, _ in matches[offset:offset + limit]]
+
+    def _score(self, term: str, name_tokens: Tuple[str, ...], email_tokens: Tuple[str, ...]) -> int:
+        best = 0
+        for tokens, weight in ((name_tokens, self.NAME_WEIGHT), (email_tokens, self.EMAIL_WEIGHT)):
+            for token in tokens:
+                if token == term:
+                    best = max(best, weight * 2)
+                elif weight > best and token.startswith(term):
+                    best = weight
+        return best
+
+    @staticmethod
+    def _candidates(postings: List[Tuple[Dict[int, None], int, int]]) -> Iterator[int]:
+        """Ids from postings tier by tier, best tier first; id order within a tier."""
+        for _, tier in groupby(postings, key=lambda item: item[2]):
+            yield from heapq.merge(*(iter(ids) for ids, _, _ in tier))
+
+    def _expand(
+        self, term: str, max_tokens: Optional[int] = None
+    ) -> Optional[List[Tuple[Dict[int, None], int, int]]]:
+        """
+        (ids, score, tier) for each token matching term, best tier first;
+        None if a field has more than max_tokens matching tokens.
+        """
+        postings = []
+        for field, (index, weight) in enumerate(
+            ((self._name, self.NAME_WEIGHT), (self._email, self.EMAIL_WEIGHT))
+        ):
+            tokens = index.expand(term, None if max_tokens is None else max_tokens + 1)
+            if max_tokens is not None and len(tokens) > max_tokens:
+                return None
+            for token, ids in tokens:
+                exact = token == term
+                postings.append((ids, weight * 2 if exact else weight, field * 2 + (0 if exact else 1)))
+        postings.sort(key=lambda item: item[2])
+        return postings
@@ -1,39 +1,344 @@
-from typing import List, Optional
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 from datetime import datetime
+from functools import lru_cache
+import bisect
+import logging
+import threading
 
+from app.config.settings import settings
+from app.db.search import PrefixIndex
 from app.models import User, UserCreate
 
+logger = logging.getLogger(__name__)
+
+
+class DuplicateEmailError(ValueError):
+    def __init__(self, email: str):
+        super().__init__(f"Email already registered: {email}")
+        self.email = email
+
+
+def normalize_email(email: str) -> str:
+    return email.strip().lower()
+
+
+class UserStore(ABC):
+    JSON_CACHE_SIZE = 100000
+
+    def __init__(self):
+        self._handlers: List[Callable[[int], None]] = []
+        self._json_cache: Dict[int, Tuple[int, bytes]] = {}
+
+    @abstractmethod
+    def get_all(self) -> List[User]:
+        pass
+
+    @abstractmethod
+    def list_after(self, after_id: int = 0, limit: int = 100) -> List[User]:
+        pass
+
+    @abstractmethod
+    def get_by_id(self, user_id: int) -> Optional[User]:
+        pass
+
+    @abstractmethod
+    def get_by_email(self, email: str) -> Optional[User]:
+        pass
+
+    @abstractmethod
+    def create(self, user_data: UserCreate) -> User:
+        pass
+
+    @abstractmethod
+    def update(self, user_id: int, updates: Dict[str, Any]) -> Optional[User]:
+        pass
+
+    @abstractmethod
+    def delete(self, user_id: int) -> bool:
+        pass
+
+    @abstractmethod
+    def count(self) -> int:
+        pass
+
+    @abstractmethod
+    def get_password_hash(self, user_id: int) -> Optional[str]:
+        pass
+
+    @abstractmethod
+    def set_password_hash(self, user_id: int, password_hash: str) -> bool:
+        """Store the user's password hash; False if the user is unknown."""
+        pass
+
+    @abstractmethod
+    def get_version(self, user_id: int) -> Optional[int]:
+        """Per-user version, bumped on every update; None if the user is unknown."""
+        pass
+
+    @abstractmethod
+    def collection_version(self) -> int:
+        """Store-wide version, bumped on every create, update and delete."""
+        pass
+
+    @abstractmethod
+    def search(self, query: str, limit: int = 20, offset: int = 0) -> List[User]:
+        """Users matching every term of query by name/email prefix, best first."""
+        pass
+
+    @abstractmethod
+    def list_versions_after(self, after_id: int = 0, limit: int = 100) -> List[Tuple[int, int]]:
+        """(id, version) pairs in id order, without materializing users."""
+        pass
+
+    def get_json(self, user_id: int) -> Optional[bytes]:
+        """Encoded JSON for one user, served from the bytes cache when current."""
+        version = self.get_version(user_id)
+        if version is None:
+            return None
+        encoded = self._encode_versions([(user_id, version)])
+        return encoded[0] if encoded else None
+
+    def list_json_after(self, after_id: int = 0, limit: int = 100) -> List[Tuple[int, bytes]]:
+        """Keyset page of (id, encoded JSON) pairs, see list_after."""
+        versions = self.list_versions_after(after_id, limit)
+        ids = [user_id for user_id, _ in versions]
+        return list(zip(ids, self._encode_versions(versions)))
+
+    def _encode_versions(self, versions: List[Tuple[int, int]]) -> List[bytes]:
+        # Entries are tagged with the version they were encoded at, so a
+        # write from another worker is detected even without a local
+        # invalidation. Versions are read before the users are loaded, so a
+        # racing write can only leave an entry tagged older than its bytes.
+        encoded: Dict[int, bytes] = {}
+        misses: Dict[int, int] = {}
+        for user_id, version in versions:
+            entry = self._json_cache.get(user_id)
+            if entry is not None and entry[0] == version:
+                encoded[user_id] = entry[1]
+            else:
+                misses[user_id] = version
+
+        if misses:
+            for user_id, user in self.get_many(list(misses)).items():
+                data = user.model_dump_json().encode()
+                if len(self._json_cache) >= self.JSON_CACHE_SIZE:
+                    self._json_cache.pop(next(iter(self._json_cache)), None)
+                self._json_cache[user_id] = (misses[user_id], data)
+                encoded[user_id] = data
+
+        return [encoded[user_id] for user_id, _ in versions if user_id in encoded]
+
+    def get_many(self, user_ids: Iterable[int]) -> Dict[int, User]:
+        result = {}
+        for user_id in user_ids:
+            user = self.get_by_id(user_id)
+            if user is not None:
+                result[user_id] = user
+        return result
+
+    def add_handler(self, handler: Callable[[int], None]) -> None:
+        """Register a callback invoked with the user id after every write."""
+        self._handlers.append(handler)
+
+    def _notify(self, user_id: int) -> None:
+        self._json_cache.pop(user_id, None)
+        for handler in self._handlers:
+            try:
+                handler(user_id)
+            except Exception as e:
+                logger.error(f"User store handler error: {e}")
+
+    def create_many(self, users: List[UserCreate]) -> List[Optional[User]]:
+        """
+        Create users in one batch. The result is aligned with the input;
+        entries whose email is already taken (in the store or earlier in
+        the batch) come back as None instead of aborting the batch.
+        """
+        results: List[Optional[User]] = []
+        for user_data in users:
+            try:
+                results.append(self.create(user_data))
+            except DuplicateEmailError:
+                results.append(None)
+        return results
+
+    def iter_all(self, chunk_size: int = 500) -> Iterator[List[User]]:
+        after_id = 0
+        while True:
+            chunk = self.list_after(after_id, chunk_size)
+            if not chunk:
+                return
+            yield chunk
+            after_id = chunk[-1].id
+
+
+class UserDB(UserStore):
+    """
+    In-memory user storage for demo purposes.
+
+    Users are kept in a primary index keyed by id (insertion order doubles
+    as id order) and a unique secondary index keyed by normalized email.
+    Every write goes through create/update/delete so both indexes stay in
+    sync and lookups never scan the table. A sorted id list backs keyset
+    pagination; ids are allocated monotonically so creates only append.
+    Per-user and collection versions and the search index are maintained
+    under the same lock.
+    """
 
-class UserDB:
-    """In-memory user storage for demo purposes."""
-    
     def __init__(self):
-        self._users: List[User] = []
+        super().__init__()
+        self._users: Dict[int, User] = {}
+        self._email_index: Dict[str, int] = {}
+        self._ids: List[int] = []
+        self._versions: Dict[int, int] = {}
+        self._password_hashes: Dict[int, str] = {}
+        self._collection_version = 0
+        self._search_index = PrefixIndex()
         self._next_id = 1
-    
+        self._lock = threading.RLock()
+
     def get_all(self) -> List[User]:
-        return self._users
-    
+        return list(self._users.values())
+
+    def list_after(self, after_id: int = 0, limit: int = 100) -> List[User]:
+        start = bisect.bisect_right(self._ids, after_id)
+        users = (self._users.get(user_id) for user_id in self._ids[start:start + limit])
+        return [user for user in users if user is not None]
+
     def get_by_id(self, user_id: int) -> Optional[User]:
-        for user in self._users:
-            if user.id == user_id:
-                return user
-        return None
-    
+        return self._users.get(user_id)
+
+    def get_many(self, user_ids: Iterable[int]) -> Dict[int, User]:
+        users = self._users
+        return {user_id: users[user_id] for user_id in user_ids if user_id in users}
+
     def get_by_email(self, email: str) -> Optional[User]:
-        for user in self._users:
-            if user.email == email:
-                return user
-        return None
-    
+        user_id = self._email_index.get(normalize_email(email))
+        if user_id is None:
+            return None
+        return self._users.get(user_id)
+
     def create(self, user_data: UserCreate) -> User:
+        with self._lock:
+            user = self._insert(user_data, datetime.utcnow())
+        self._notify(user.id)
+        return user
+
+    def create_many(self, users: List[UserCreate]) -> List[Optional[User]]:
+        created_at = datetime.utcnow()
+        results: List[Optional[User]] = []
+        with self._lock:
+            for user_data in users:
+                try:
+                    results.append(self._insert(user_data, created_at))
+                except DuplicateEmailError:
+                    results.append(None)
+        for user in results:
+            if user is not None:
+                self._notify(user.id)
+        return results
+
+    def _insert(self, user_data: UserCreate, created_at: datetime) -> User:
+        key = normalize_email(user_data.email)
+        if key in self._email_index:
+            raise DuplicateEmailError(user_data.email)
+
         user = User(
             id=self._next_id,
-            email=user_data.email,
+            email=key,
             name=user_data.name,
-            created_at=datetime.utcnow(),
+            created_at=created_at,
             is_active=True
         )
-        self._users.append(user)
+        self._users[user.id] = user
+        self._email_index[key] = user.id
+        self._ids.append(user.id)
+        self._versions[user.id] = 1
+        self._search_index.add(user.id, user.name, user.email)
+        self._collection_version += 1
         self._next_id += 1
         return user
+
+    def update(self, user_id: int, updates: Dict[str, Any]) -> Optional[User]:
+        with self._lock:
+            user = self._users.get(user_id)
+            if user is None:
+                return None
+
+            old_key = normalize_email(user.email)
+            new_key = normalize_email(updates.get("email", user.email))
+            if new_key != old_key and new_key in self._email_index:
+                raise DuplicateEmailError(updates["email"])
+            if "email" in updates:
+                updates = {**updates, "email": new_key}
+
+            updated = user.model_copy(update=updates)
+            self._users[user_id] = updated
+            if new_key != old_key:
+                del self._email_index[old_key]
+                self._email_index[new_key] = user_id
+            self._search_index.remove(user_id, user.name, user.email)
+            self._search_index.add(user_id, updated.name, updated.email)
+            self._versions[user_id] += 1
+            self._collection_version += 1
+        self._notify(user_id)
+        return updated
+
+    def delete(self, user_id: int) -> bool:
+        with self._lock:
+            user = self._users.pop(user_id, None)
+            if user is None:
+                return False
+            self._email_index.pop(normalize_email(user.email), None)
+            del self._ids[bisect.bisect_left(self._ids, user_id)]
+            del self._versions[user_id]
+            self._password_hashes.pop(user_id, None)
+            self._search_index.remove(user_id, user.name, user.email)
+            self._collection_version += 1
+        self._notify(user_id)
+        return True
+
+    def count(self) -> int:
+        return len(self._users)
+
+    def get_password_hash(self, user_id: int) -> Optional[str]:
+        return self._password_hashes.get(user_id)
+
+    def set_password_hash(self, user_id: int, password_hash: str) -> bool:
+        with self._lock:
+            if user_id not in self._users:
+                return False
+            self._password_hashes[user_id] = password_hash
+            return True
+
+    def get_version(self, user_id: int) -> Optional[int]:
+        return self._versions.get(user_id)
+
+    def collection_version(self) -> int:
+        return self._collection_version
+
+    def search(self, query: str, limit: int = 20, offset: int = 0) -> List[User]:
+        with self._lock:
+            user_ids = self._search_index.search(query, limit, offset)
+            return [self._users[user_id] for user_id in user_ids]
+
+    def list_versions_after(self, after_id: int = 0, limit: int = 100) -> List[Tuple[int, int]]:
+        start = bisect.bisect_right(self._ids, after_id)
+        versions = ((user_id, self._versions.get(user_id)) for user_id in self._ids[start:start + limit])
+        return [(user_id, version) for user_id, version in versions if version is not None]
+
+
+@lru_cache()
+def get_user_store() -> UserStore:
+    """
+    Return the process-wide user store selected by
+    ``settings.database.user_store`` ("memory" or "sqlite").
+    """
+    backend = settings.database.user_store
+    if backend == "memory":
+        return UserDB()
+    if backend == "sqlite":
+        from app.db.repository import UserRepository
+        return UserRepository()
+    raise ValueError(f"Unknown user store backend: {backend}")
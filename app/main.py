@@ -1,9 +1,9 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.middleware.base import BaseHTTPMiddleware
 
+from app.auth.password import get_iterations
 from app.routes import users, health, auth
-from app.middleware.rate_limit import rate_limit_middleware
+from app.middleware.rate_limit import RateLimitMiddleware, install_policies
 
 app = FastAPI(
     title="Memorum Test API",
@@ -19,8 +19,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.add_middleware(BaseHTTPMiddleware, dispatch=rate_limit_middleware)
+app.add_middleware(RateLimitMiddleware)
 
 app.include_router(health.router)
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
 app.include_router(users.router, prefix="/users", tags=["users"])
+
+install_policies(app.routes)
+
+# Settle the password hashing policy (calibrating it if a time budget is
+# set) before serving, rather than on the first login.
+get_iterations()
@@ -1,7 +1,40 @@
-from collections import defaultdict
 from datetime import datetime, timedelta
-from typing import Dict, Tuple
-from fastapi import Request, HTTPException
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+import json
+import logging
+import math
+import time
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.auth.jwt import verify_token_cached
+from app.cache.keys import CacheKey
+from app.config.features import feature_flags
+from app.config.settings import RateLimitSettings, settings
+from app.middleware.rate_limit_backends import (
+    ClientStateStore,
+    MemoryRateLimitBackend,
+    RateLimitBackend,
+    create_rate_limit_backend,
+)
+from app.middleware.rate_limit_policies import (
+    RATE_LIMIT_RULES,
+    PolicyTable,
+    RateLimitPolicy,
+    RateLimitRule,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_after: float
+    retry_after: float = 0.0
 
 
 class RateLimiter:
@@ -14,53 +47,309 @@ class RateLimiter:
     - Easier to debug when users hit limits
     
     For production, this should be replaced with Redis-backed storage.
+    
+    Per-client state lives in a bounded ClientStateStore. A client evicted
+    under memory pressure simply starts over with a fresh allowance.
     """
     
-    def __init__(self, requests_per_minute: int = 60):
+    def __init__(
+        self,
+        requests_per_minute: int = 60,
+        max_clients: int = 100000,
+        idle_ttl: float = 300.0,
+        shards: int = 16,
+    ):
         self.requests_per_minute = requests_per_minute
         self.window_size = timedelta(minutes=1)
-        self._requests: Dict[str, list] = defaultdict(list)
+        self._clients = ClientStateStore(max_clients, idle_ttl, shards)
     
-    def _clean_old_requests(self, client_id: str, now: datetime) -> None:
+    def check(self, client_id: str, cost: int = 1, limit: Optional[int] = None) -> RateLimitResult:
+        """
+        Count a request costing ``cost`` units against ``limit`` (default
+        requests_per_minute) for client_id, if it fits.
+        """
+        limit = limit or self.requests_per_minute
+        now = datetime.utcnow()
         cutoff = now - self.window_size
-        self._requests[client_id] = [
-            ts for ts in self._requests[client_id] if ts > cutoff
-        ]
+        seen = time.monotonic()
+        
+        shard = self._clients.shard(client_id)
+        with shard.lock:
+            requests = self._clients.get(shard, client_id, seen) or []
+            requests = [ts for ts in requests if ts > cutoff]
+            current_count = len(requests)
+            remaining = max(0, limit - current_count)
+            
+            if current_count + cost > limit:
+                self._clients.put(shard, client_id, requests, seen)
+                # Wait until enough of the oldest requests leave the window.
+                needed = current_count + cost - limit
+                if needed > current_count:
+                    retry_after = self.window_size.total_seconds()
+                else:
+                    retry_after = (requests[needed - 1] + self.window_size - now).total_seconds()
+                reset_after = (requests[-1] + self.window_size - now).total_seconds() if requests else 0.0
+                return RateLimitResult(False, limit, remaining, reset_after, retry_after)
+            
+            requests.extend([now] * cost)
+            self._clients.put(shard, client_id, requests, seen)
+        return RateLimitResult(
+            True, limit, remaining - cost, self.window_size.total_seconds()
+        )
     
     def is_allowed(self, client_id: str) -> Tuple[bool, int]:
-        now = datetime.utcnow()
-        self._clean_old_requests(client_id, now)
-        
-        current_count = len(self._requests[client_id])
-        remaining = max(0, self.requests_per_minute - current_count)
-        
-        if current_count >= self.requests_per_minute:
-            return False, remaining
-        
-        self._requests[client_id].append(now)
-        return True, remaining - 1
+        result = self.check(client_id)
+        return result.allowed, result.remaining
     
-    def get_client_id(self, request: Request) -> str:
+    def get_client_id(self, request: HTTPConnection) -> str:
         forwarded = request.headers.get("X-Forwarded-For")
         if forwarded:
             return forwarded.split(",")[0].strip()
         return request.client.host if request.client else "unknown"
+    
+    def stats(self) -> Dict[str, Any]:
+        return self._clients.stats()
 
 
-rate_limiter = RateLimiter(requests_per_minute=60)
+class SlidingWindowRateLimiter(RateLimiter):
+    """
+    Sliding window counter rate limiter.
+    
+    Each client keeps only the counts of the current and the previous
+    fixed one-minute window. The rate over the last minute is estimated as
+    the current count plus the previous count weighted by how much of the
+    previous window still overlaps the sliding one. That makes every check
+    O(1) in time and memory regardless of the limit, at the cost of
+    assuming requests in the previous window were evenly spread.
+    
+    The counters live in a RateLimitBackend, so they can be shared by every
+    worker on the host (mmap) or across hosts (resp).
+    """
+    
+    def __init__(self, requests_per_minute: int = 60, backend: Optional[RateLimitBackend] = None, **kwargs):
+        super().__init__(requests_per_minute, **kwargs)
+        self._window_seconds = self.window_size.total_seconds()
+        self.backend = backend or MemoryRateLimitBackend(**kwargs)
+    
+    def check(self, client_id: str, cost: int = 1, limit: Optional[int] = None) -> RateLimitResult:
+        limit = limit or self.requests_per_minute
+        position = time.time() / self._window_seconds
+        window = int(position)
+        elapsed = position - window
+        
+        allowed, current, previous = self.backend.hit(client_id, window, elapsed, limit, cost)
+        
+        if not allowed:
+            # The request fits once the estimate drops below this headroom.
+            headroom = limit - cost + 1
+            if headroom <= 0:
+                wait = 2.0 - elapsed
+            elif current >= headroom:
+                # Only the next window can bring the estimate back under.
+                wait = 1.0 - elapsed + 1.0 - headroom / current
+            else:
+                wait = 1.0 - (headroom - current) / previous - elapsed
+            return RateLimitResult(
+                False, limit, 0, (2.0 - elapsed) * self._window_seconds,
+                wait * self._window_seconds,
+            )
+        
+        estimated = previous * (1.0 - elapsed) + current
+        return RateLimitResult(
+            True, limit, max(0, int(limit - estimated)),
+            (2.0 - elapsed) * self._window_seconds,
+        )
+    
+    def stats(self) -> Dict[str, Any]:
+        return self.backend.stats()
 
 
-async def rate_limit_middleware(request: Request, call_next):
-    client_id = rate_limiter.get_client_id(request)
-    allowed, remaining = rate_limiter.is_allowed(client_id)
+class TokenBucketRateLimiter(RateLimiter):
+    """
+    Token bucket rate limiter.
+    
+    Buckets refill at requests_per_minute / 60 tokens per second and hold
+    up to requests_per_minute + burst_size tokens, so a client can briefly
+    exceed the steady rate by burst_size as long as its average stays
+    within the limit. Refill is computed lazily from the monotonic clock on
+    each check, so idle clients cost nothing and wall clock jumps are
+    ignored.
+    """
+    
+    def __init__(self, requests_per_minute: int = 60, burst_size: int = 0, **kwargs):
+        super().__init__(requests_per_minute, **kwargs)
+        self.burst_size = burst_size
     
-    if not allowed:
-        raise HTTPException(
-            status_code=429,
-            detail="Rate limit exceeded. Try again in 1 minute.",
-            headers={"X-RateLimit-Remaining": "0"}
+    def check(self, client_id: str, cost: int = 1, limit: Optional[int] = None) -> RateLimitResult:
+        limit = limit or self.requests_per_minute
+        capacity = limit + self.burst_size
+        rate = limit / self.window_size.total_seconds()
+        now = time.monotonic()
+        
+        shard = self._clients.shard(client_id)
+        with shard.lock:
+            # [tokens, last refill time]
+            bucket = self._clients.get(shard, client_id, now)
+            if bucket is None:
+                bucket = [float(capacity), now]
+            else:
+                bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+                bucket[1] = now
+            
+            allowed = bucket[0] >= cost
+            if allowed:
+                bucket[0] -= cost
+            tokens = bucket[0]
+            self._clients.put(shard, client_id, bucket, now)
+        
+        if not allowed:
+            return RateLimitResult(
+                False, capacity, int(tokens), (capacity - tokens) / rate, (cost - tokens) / rate
+            )
+        return RateLimitResult(True, capacity, int(tokens), (capacity - tokens) / rate)
+
+
+RATE_LIMIT_STRATEGIES = ("sliding_log", "sliding_window", "token_bucket")
+
+
+def create_rate_limiter(config: RateLimitSettings, strategy: Optional[str] = None) -> RateLimiter:
+    if config.backend != "memory":
+        # Shared backends store sliding window counters, the only state
+        # compact enough to update atomically outside the process.
+        if (strategy or config.strategy) != "sliding_window":
+            logger.warning(f"Rate limit backend '{config.backend}' implies the sliding_window strategy")
+        return SlidingWindowRateLimiter(
+            config.requests_per_minute,
+            backend=create_rate_limit_backend(config),
+        )
+    
+    strategy = strategy or config.strategy
+    state = {
+        "max_clients": config.max_clients,
+        "idle_ttl": config.idle_ttl,
+        "shards": config.shards,
+    }
+    if strategy == "sliding_log":
+        return RateLimiter(config.requests_per_minute, **state)
+    if strategy == "sliding_window":
+        return SlidingWindowRateLimiter(config.requests_per_minute, **state)
+    if strategy == "token_bucket":
+        return TokenBucketRateLimiter(
+            config.requests_per_minute,
+            burst_size=config.burst_size,
+            **state,
+        )
+    raise ValueError(f"Unknown rate limit strategy: {strategy}")
+
+
+rate_limiter = create_rate_limiter(settings.rate_limit)
+sliding_rate_limiter = (
+    rate_limiter if settings.rate_limit.backend != "memory"
+    else create_rate_limiter(settings.rate_limit, "sliding_window")
+)
+
+
+def get_rate_limiter() -> RateLimiter:
+    # rate_limit_v2 predates the strategy setting and only upgrades the
+    # default sliding log; an explicitly configured strategy wins.
+    if settings.rate_limit.strategy == "sliding_log" and feature_flags.is_enabled("rate_limit_v2"):
+        return sliding_rate_limiter
+    return rate_limiter
+
+
+def rate_limit_headers(result: RateLimitResult) -> Dict[str, str]:
+    headers = {
+        "X-RateLimit-Limit": str(result.limit),
+        "X-RateLimit-Remaining": str(result.remaining),
+        "X-RateLimit-Reset": str(math.ceil(result.reset_after)),
+    }
+    if not result.allowed:
+        headers["Retry-After"] = str(max(1, math.ceil(result.retry_after)))
+    return headers
+
+
+policy_table = PolicyTable()
+
+
+def install_policies(routes: Iterable, rules: Iterable[RateLimitRule] = RATE_LIMIT_RULES) -> PolicyTable:
+    """Compile per-route policies for the app's routes; call once at startup."""
+    global policy_table
+    policy_table = PolicyTable.compile(routes, rules)
+    return policy_table
+
+
+def rate_limit_key(request: HTTPConnection, limiter: RateLimiter, policy: RateLimitPolicy) -> str:
+    if policy.key == "sub":
+        authorization = request.headers.get("Authorization")
+        if authorization and authorization[:7].lower() == "bearer ":
+            payload = verify_token_cached(authorization[7:].strip())
+            if payload and payload.get("sub"):
+                return CacheKey.rate_limit(f"sub:{payload['sub']}", policy.name)
+    return CacheKey.rate_limit(f"ip:{limiter.get_client_id(request)}", policy.name)
+
+
+@lru_cache(maxsize=256)
+def _rejection(retry_after: str) -> Tuple[bytes, bytes]:
+    """429 body and its content-length for a Retry-After value, built once."""
+    body = json.dumps(
+        {"detail": f"Rate limit exceeded. Retry after {retry_after}s."},
+        separators=(",", ":"),
+    ).encode()
+    return body, str(len(body)).encode()
+
+
+class RateLimitMiddleware:
+    """
+    Pure ASGI rate limiting.
+    
+    Runs inline in the server's task instead of behind BaseHTTPMiddleware's
+    extra task and body stream, so streaming responses pass through
+    untouched. Rejected requests never reach the app: the 429 is written
+    straight to ``send`` from a prebuilt body. Allowed requests get their
+    X-RateLimit headers appended to ``http.response.start`` on the way out.
+    """
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.rate_limit.enabled:
+            await self.app(scope, receive, send)
+            return
+        
+        policy = policy_table.resolve(scope["method"], scope["path"])
+        if policy.exempt:
+            await self.app(scope, receive, send)
+            return
+        
+        limiter = get_rate_limiter()
+        result = limiter.check(
+            rate_limit_key(HTTPConnection(scope), limiter, policy),
+            policy.cost,
+            policy.requests_per_minute,
         )
+        headers = rate_limit_headers(result)
+        
+        if not result.allowed:
+            await self._reject(send, headers)
+            return
+        
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                response_headers = MutableHeaders(scope=message)
+                for name, value in headers.items():
+                    response_headers.append(name, value)
+            await send(message)
+        
+        await self.app(scope, receive, send_with_headers)
     
-    response = await call_next(request)
-    response.headers["X-RateLimit-Remaining"] = str(remaining)
-    return response
+    @staticmethod
+    async def _reject(send: Send, headers: Dict[str, str]) -> None:
+        body, length = _rejection(headers["Retry-After"])
+        raw: List[Tuple[bytes, bytes]] = [
+            (b"content-type", b"application/json"),
+            (b"content-length", length),
+        ]
+        raw.extend((name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers.items())
+        await send({"type": "http.response.start", "status": 429, "headers": raw})
+        await send({"type": "http.response.body", "body": body})
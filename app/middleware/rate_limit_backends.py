@@ -0,0 +1,370 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+import hashlib
+import logging
+import mmap
+import os
+import stat
+import struct
+import tempfile
+import threading
+import time
+
+from app.config.settings import RateLimitSettings
+
+logger = logging.getLogger(__name__)
+
+
+class _Shard:
+    __slots__ = ("lock", "entries", "evictions", "expirations")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.evictions = 0
+        self.expirations = 0
+
+
+class ClientStateStore:
+    """
+    Bounded per-client limiter state.
+
+    Clients are spread over independently locked shards, each an LRU
+    ordered by last access. Because access order is also last-seen order,
+    idle entries always sit at the head of a shard and are dropped in
+    amortized O(1) as new clients arrive; when a shard is still full, its
+    least recently seen client is evicted. Eviction only ever touches the
+    shard being written, so it never blocks requests for other clients.
+
+    Callers hold ``shard.lock`` around get/put so a client's check and
+    update are atomic.
+    """
+
+    def __init__(self, max_entries: int = 100000, idle_ttl: float = 300.0, shards: int = 16):
+        self.max_entries = max_entries
+        self.idle_ttl = idle_ttl
+        self._shards = [_Shard() for _ in range(shards)]
+        self._shard_max = max(1, max_entries // shards)
+
+    def shard(self, client_id: str) -> _Shard:
+        return self._shards[hash(client_id) % len(self._shards)]
+
+    def get(self, shard: _Shard, client_id: str, now: float) -> Optional[Any]:
+        entry = shard.entries.get(client_id)
+        if entry is None:
+            return None
+        if now - entry[0] > self.idle_ttl:
+            del shard.entries[client_id]
+            shard.expirations += 1
+            return None
+        return entry[1]
+
+    def put(self, shard: _Shard, client_id: str, state: Any, now: float) -> None:
+        entries = shard.entries
+        if client_id in entries:
+            entries.move_to_end(client_id)
+        else:
+            cutoff = now - self.idle_ttl
+            while entries and next(iter(entries.values()))[0] < cutoff:
+                entries.popitem(last=False)
+                shard.expirations += 1
+            if len(entries) >= self._shard_max:
+                entries.popitem(last=False)
+                shard.evictions += 1
+        entries[client_id] = (now, state)
+
+    def clear(self) -> None:
+        for shard in self._shards:
+            with shard.lock:
+                shard.entries.clear()
+
+    def __len__(self) -> int:
+        return sum(len(shard.entries) for shard in self._shards)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tracked_clients": len(self),
+            "max_entries": self.max_entries,
+            "idle_ttl": self.idle_ttl,
+            "shards": len(self._shards),
+            "evictions": sum(shard.evictions for shard in self._shards),
+            "expirations": sum(shard.expirations for shard in self._shards),
+        }
+
+
+class RateLimitBackend(ABC):
+    """
+    Storage for sliding window counters.
+
+    A backend owns the per-client pair of fixed-window counts and performs
+    one check atomically: roll the counts forward to ``window``, estimate
+    the rate as ``previous * (1 - elapsed) + current`` and add ``cost`` to
+    the current count only if the estimate plus cost stays within
+    ``limit``.
+    """
+
+    @abstractmethod
+    def hit(
+        self, client_id: str, window: int, elapsed: float, limit: int, cost: int = 1
+    ) -> Tuple[bool, int, int]:
+        """Returns (allowed, current count, previous count) as seen by the check."""
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """Per-process counters in a bounded ClientStateStore."""
+
+    def __init__(self, max_clients: int = 100000, idle_ttl: float = 300.0, shards: int = 16):
+        self._clients = ClientStateStore(max_clients, idle_ttl, shards)
+
+    def hit(
+        self, client_id: str, window: int, elapsed: float, limit: int, cost: int = 1
+    ) -> Tuple[bool, int, int]:
+        now = time.monotonic()
+        shard = self._clients.shard(client_id)
+        with shard.lock:
+            # [window index, current count, previous count]
+            state = self._clients.get(shard, client_id, now)
+            if state is None:
+                state = [window, 0, 0]
+            elif state[0] != window:
+                state[2] = state[1] if state[0] == window - 1 else 0
+                state[1] = 0
+                state[0] = window
+
+            allowed = state[2] * (1.0 - elapsed) + state[1] + cost - 1 < limit
+            if allowed:
+                state[1] += cost
+            self._clients.put(shard, client_id, state, now)
+            return allowed, state[1], state[2]
+
+    def stats(self) -> Dict[str, Any]:
+        return self._clients.stats()
+
+
+class MmapRateLimitBackend(RateLimitBackend):
+    """
+    Counters in a memory-mapped file shared by every worker on the host.
+
+    The file is a fixed open-addressing hash table of SLOT records
+    (fingerprint, window, current, previous) keyed by a 64-bit blake2b
+    fingerprint of the client id, so its size never grows. The table is
+    split into stripes, each guarded by an fcntl record lock (across
+    processes) and a thread lock (within one); a client only ever probes
+    the PROBE_LIMIT slots after its home slot inside its stripe. Slots whose
+    window is older than the previous one hold nothing that matters and
+    are reused; when every probed slot is live, the one with the oldest
+    window is evicted. A check is a hash, two lock syscalls and a few
+    struct reads and writes.
+    """
+
+    MAGIC = b"MRLv1\0\0\0"
+    HEADER = struct.Struct("<8sQ")
+    SLOT = struct.Struct("<QqII")
+    STRIPES = 256
+    PROBE_LIMIT = 8
+
+    def __init__(self, path: str, max_clients: int = 100000):
+        import fcntl
+        self._fcntl = fcntl
+
+        slots = 1
+        while slots < max_clients * 2:
+            slots <<= 1
+        self._slots = max(slots, self.STRIPES)
+        self._stripe_slots = self._slots // self.STRIPES
+        self._stripe_bytes = self._stripe_slots * self.SLOT.size
+        self._size = self.HEADER.size + self._slots * self.SLOT.size
+        self._locks = [threading.Lock() for _ in range(self.STRIPES)]
+        self._evictions = 0
+
+        # The file steers every worker's limits, so refuse a symlink or a
+        # file someone else planted at the path.
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_NOFOLLOW, 0o600)
+        info = os.fstat(self._fd)
+        if not stat.S_ISREG(info.st_mode) or info.st_uid != os.getuid():
+            os.close(self._fd)
+            raise PermissionError(f"Rate limit file {path} is not a regular file owned by this user")
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            header = os.pread(self._fd, self.HEADER.size, 0)
+            # Only a file no worker has mapped yet (empty, or left with a
+            # zeroed header by an interrupted setup) may be laid out again;
+            # shrinking a file another worker maps would crash it.
+            if header.strip(b"\0") == b"":
+                os.ftruncate(self._fd, self._size)
+                os.pwrite(self._fd, self.HEADER.pack(self.MAGIC, self._slots), 0)
+            elif len(header) != self.HEADER.size or self.HEADER.unpack(header) != (self.MAGIC, self._slots):
+                raise ValueError(
+                    f"Rate limit file {path} has a different layout; it may be in use by "
+                    f"workers with another max_clients, so use a separate path"
+                )
+        except BaseException:
+            os.close(self._fd)
+            raise
+        else:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._map = mmap.mmap(self._fd, self._size)
+        self.path = path
+
+    def hit(
+        self, client_id: str, window: int, elapsed: float, limit: int, cost: int = 1
+    ) -> Tuple[bool, int, int]:
+        fingerprint = int.from_bytes(
+            hashlib.blake2b(client_id.encode(), digest_size=8).digest(), "little"
+        ) | 1
+        home = fingerprint & (self._slots - 1)
+        stripe = home // self._stripe_slots
+        base = self.HEADER.size + stripe * self._stripe_bytes
+        first = home - stripe * self._stripe_slots
+
+        slot_struct = self.SLOT
+        slot_size = slot_struct.size
+        mapped = self._map
+        lockf = self._fcntl.lockf
+
+        with self._locks[stripe]:
+            lockf(self._fd, self._fcntl.LOCK_EX, self._stripe_bytes, base)
+            try:
+                target = free = oldest = -1
+                oldest_window = 0
+                current = previous = 0
+                for step in range(self.PROBE_LIMIT):
+                    offset = base + ((first + step) % self._stripe_slots) * slot_size
+                    slot_fp, slot_window, slot_current, slot_previous = slot_struct.unpack_from(mapped, offset)
+                    if slot_fp == fingerprint:
+                        target = offset
+                        if slot_window == window:
+                            current, previous = slot_current, slot_previous
+                        elif slot_window == window - 1:
+                            previous = slot_current
+                        break
+                    if slot_fp == 0 or slot_window < window - 1:
+                        if free < 0:
+                            free = offset
+                    elif oldest < 0 or slot_window < oldest_window:
+                        oldest, oldest_window = offset, slot_window
+
+                if target < 0:
+                    if free >= 0:
+                        target = free
+                    else:
+                        target = oldest
+                        self._evictions += 1
+
+                allowed = previous * (1.0 - elapsed) + current + cost - 1 < limit
+                if allowed:
+                    current += cost
+                slot_struct.pack_into(mapped, target, fingerprint, window, current, previous)
+            finally:
+                lockf(self._fd, self._fcntl.LOCK_UN, self._stripe_bytes, base)
+        return allowed, current, previous
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "slots": self._slots,
+            "stripes": self.STRIPES,
+            "evictions": self._evictions,
+        }
+
+    def close(self) -> None:
+        self._map.close()
+        os.close(self._fd)
+
+
+class RESPRateLimitBackend(RateLimitBackend):
+    """
+    Counters in a Redis-protocol server, shared by every worker and host.
+
+    Each fixed window is one key, ``<client key>:<window>``, that expires
+    after two windows. Client keys come from CacheKey.rate_limit, so they
+    are already namespaced. A check is one pipelined round trip (GET
+    previous, INCRBY current, EXPIRE); a rejected request is un-counted
+    with a DECRBY. Without server-side scripting the pair can
+    briefly over-count under contention, which only makes the limiter
+    stricter. If the server is unreachable the backend fails open and logs,
+    then skips the server for RETRY_INTERVAL seconds so requests do not each
+    wait out the timeout on the event loop while it is down.
+    """
+
+    RETRY_INTERVAL = 5.0
+
+    def __init__(self, url: str, window_seconds: float = 60.0, timeout: float = 0.25):
+        from app.cache.resp import RESPClient
+        self._client = RESPClient(url, timeout=timeout)
+        self._ttl = int(window_seconds * 2)
+        self._errors = 0
+        self._skipped = 0
+        self._retry_at = 0.0
+
+    def hit(
+        self, client_id: str, window: int, elapsed: float, limit: int, cost: int = 1
+    ) -> Tuple[bool, int, int]:
+        if time.monotonic() < self._retry_at:
+            self._skipped += 1
+            return True, 0, 0
+        current_key = f"{client_id}:{window}"
+        try:
+            previous, current, _ = self._client.pipeline([
+                ("GET", f"{client_id}:{window - 1}"),
+                ("INCRBY", current_key, cost),
+                ("EXPIRE", current_key, self._ttl),
+            ])
+            previous = int(previous or 0)
+            if previous * (1.0 - elapsed) + current - 1 < limit:
+                return True, current, previous
+            self._client.execute("DECRBY", current_key, cost)
+            return False, current - cost, previous
+        except Exception as e:
+            self._errors += 1
+            self._retry_at = time.monotonic() + self.RETRY_INTERVAL
+            logger.error(f"Rate limit backend error, failing open for {self.RETRY_INTERVAL}s: {e}")
+            return True, 0, 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {"errors": self._errors, "skipped": self._skipped}
+
+    def close(self) -> None:
+        self._client.close()
+
+
+def _private_dir() -> str:
+    """
+    A directory only this user can use: $XDG_RUNTIME_DIR when set, else a
+    0700 directory of its own under the temp dir. Raises PermissionError
+    if the directory is a symlink, someone else's, or open to others.
+    """
+    path = os.environ.get("XDG_RUNTIME_DIR") or os.path.join(
+        tempfile.gettempdir(), f"memorum-{os.getuid()}"
+    )
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise PermissionError(f"{path} must be a directory owned by this user with mode 0700")
+    return path
+
+
+def create_rate_limit_backend(config: RateLimitSettings, window_seconds: float = 60.0) -> RateLimitBackend:
+    if config.backend == "memory":
+        return MemoryRateLimitBackend(config.max_clients, config.idle_ttl, config.shards)
+    if config.backend == "mmap":
+        path = config.shared_path or os.path.join(
+            _private_dir(), f"memorum-rate-limit-{config.max_clients}.bin"
+        )
+        return MmapRateLimitBackend(path, config.max_clients)
+    if config.backend == "resp":
+        if not config.redis_url:
+            raise ValueError("Rate limit backend 'resp' requires a redis_url")
+        return RESPRateLimitBackend(config.redis_url, window_seconds)
+    raise ValueError(f"Unknown rate limit backend: {config.backend}")
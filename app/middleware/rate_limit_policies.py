@@ -0,0 +1,114 @@
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class RateLimitPolicy:
+    """
+    How requests to a route are limited.
+
+    ``name`` selects the bucket, so routes sharing a name share an
+    allowance. ``requests_per_minute`` of None means the global limit.
+    ``key`` is "ip" or "sub"; with "sub", authenticated requests get a
+    bucket per token subject and anonymous ones fall back to their IP.
+    """
+    name: str
+    requests_per_minute: Optional[int] = None
+    cost: int = 1
+    exempt: bool = False
+    key: str = "ip"
+
+
+@dataclass(frozen=True)
+class RateLimitRule:
+    """
+    Applies ``policy`` to routes whose method matches ``method`` ("*" for
+    any) and whose path template equals ``path``, or starts with it when
+    ``path`` ends in "*".
+    """
+    method: str
+    path: str
+    policy: RateLimitPolicy
+
+    def matches(self, method: str, path: str) -> bool:
+        if self.method != "*" and self.method != method:
+            return False
+        if self.path.endswith("*"):
+            return path.startswith(self.path[:-1])
+        return path == self.path
+
+
+DEFAULT_POLICY = RateLimitPolicy("default")
+
+# First matching rule wins.
+RATE_LIMIT_RULES: List[RateLimitRule] = [
+    RateLimitRule("*", "/health", RateLimitPolicy("health", exempt=True)),
+    RateLimitRule("POST", "/auth/login", RateLimitPolicy("auth", requests_per_minute=10)),
+    RateLimitRule("POST", "/auth/register", RateLimitPolicy("auth", requests_per_minute=10)),
+    RateLimitRule("POST", "/auth/refresh", RateLimitPolicy("auth_refresh", requests_per_minute=30)),
+    RateLimitRule("*", "/auth/*", RateLimitPolicy("default", key="sub")),
+    RateLimitRule("POST", "/users/bulk", RateLimitPolicy("users_write", cost=10, key="sub")),
+    RateLimitRule("POST", "/users/lookup", RateLimitPolicy("default", cost=2, key="sub")),
+    RateLimitRule("GET", "/users/search", RateLimitPolicy("default", cost=2, key="sub")),
+    RateLimitRule("*", "/users*", RateLimitPolicy("default", key="sub")),
+]
+
+
+class PolicyTable:
+    """
+    Route policies resolved once, at compile time, into dict lookups.
+
+    Static route paths map straight from (method, path) to their policy.
+    Templated paths are grouped by (method, segment count, first segment),
+    which in practice leaves one or two candidates to compare segment by
+    segment. Anything unmatched, including unknown paths, gets the
+    default policy.
+    """
+
+    def __init__(self, default: RateLimitPolicy = DEFAULT_POLICY):
+        self.default = default
+        self._exact: Dict[Tuple[str, str], RateLimitPolicy] = {}
+        self._templates: Dict[Tuple[str, int, str], List[Tuple[List[Optional[str]], RateLimitPolicy]]] = {}
+
+    @classmethod
+    def compile(
+        cls,
+        routes: Iterable,
+        rules: Iterable[RateLimitRule] = RATE_LIMIT_RULES,
+        default: RateLimitPolicy = DEFAULT_POLICY,
+    ) -> "PolicyTable":
+        rules = list(rules)
+        table = cls(default)
+        for route in routes:
+            path = getattr(route, "path", None)
+            methods = getattr(route, "methods", None)
+            if path is None or not methods:
+                continue
+            for method in methods:
+                policy = next((rule.policy for rule in rules if rule.matches(method, path)), default)
+                table.add(method, path, policy)
+        return table
+
+    def add(self, method: str, path: str, policy: RateLimitPolicy) -> None:
+        segments = path.strip("/").split("/")
+        if "{" not in path:
+            self._exact.setdefault((method, path), policy)
+            return
+        pattern = [None if segment.startswith("{") else segment for segment in segments]
+        key = (method, len(segments), pattern[0] or "")
+        self._templates.setdefault(key, []).append((pattern, policy))
+
+    def resolve(self, method: str, path: str) -> RateLimitPolicy:
+        policy = self._exact.get((method, path))
+        if policy is not None:
+            return policy
+
+        segments = path.strip("/").split("/")
+        candidates = self._templates.get((method, len(segments), segments[0]))
+        if candidates is None:
+            candidates = self._templates.get((method, len(segments), ""))
+        if candidates:
+            for pattern, policy in candidates:
+                if all(part is None or part == segment for part, segment in zip(pattern, segments)):
+                    return policy
+        return self.default
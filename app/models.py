@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -25,3 +25,37 @@ class UserResponse(BaseModel):
     success: bool
     data: Optional[User] = None
     error: Optional[str] = None
+
+
+class UserListResponse(BaseModel):
+    success: bool
+    data: List[User] = []
+    next_cursor: Optional[int] = None
+
+
+class BulkItemError(BaseModel):
+    index: int
+    error: str
+
+
+class BulkCreateResponse(BaseModel):
+    success: bool
+    created: int = 0
+    failed: int = 0
+    errors: List[BulkItemError] = []
+
+
+class UserLookupRequest(BaseModel):
+    ids: List[int]
+
+
+class UserLookupResponse(BaseModel):
+    success: bool
+    data: List[Optional[User]] = []
+    missing: List[int] = []
+
+
+class UserSearchResponse(BaseModel):
+    success: bool
+    data: List[User] = []
+    next_offset: Optional[int] = None
@@ -1,78 +1,165 @@
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.concurrency import run_in_threadpool
 from datetime import timedelta
+from typing import Optional
 
-from app.auth.models import LoginRequest, RegisterRequest, TokenResponse, AuthUser
-from app.auth.jwt import create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
-from app.auth.password import hash_password, verify_password
+from app.auth.models import (
+    LoginRequest,
+    LogoutRequest,
+    RefreshRequest,
+    RegisterRequest,
+    TokenResponse,
+    AuthUser,
+)
+from app.auth.jwt import (
+    create_access_token,
+    create_refresh_token,
+    revoke_token,
+    verify_token,
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+)
+from app.auth.password import (
+    PasswordHasherBusyError,
+    hash_password_async,
+    needs_rehash,
+    verify_password_async,
+)
 from app.auth.middleware import require_auth
-from app.db.users import UserDB
-from app.models import UserCreate
+from app.auth.revocation import RevocationStoreFullError
+from app.auth.session import cache_session, get_session, invalidate_session
+from app.db.users import DuplicateEmailError, get_user_store
+from app.models import User, UserCreate
 
 router = APIRouter()
-db = UserDB()
+db = get_user_store()
+db.add_handler(invalidate_session)
 
-passwords_store: dict = {}
 
+def _hasher_busy() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Authentication service busy, retry shortly",
+        headers={"Retry-After": "1"},
+    )
 
-@router.post("/register", response_model=TokenResponse)
-async def register(request: RegisterRequest):
-    existing = db.get_by_email(request.email.lower())
-    if existing:
-        raise HTTPException(status_code=409, detail="Email already registered")
-    
-    user_data = UserCreate(email=request.email.lower(), name=request.name)
-    user = db.create(user_data)
-    
-    passwords_store[user.id] = hash_password(request.password)
-    
+
+def _revocation_full() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Token revocation unavailable, retry later",
+        headers={"Retry-After": "60"},
+    )
+
+
+def _issue_tokens(user: User) -> TokenResponse:
+    cache_session(user)
+    claims = {"sub": str(user.id), "email": user.email}
     token = create_access_token(
-        data={"sub": str(user.id), "email": user.email},
+        data=claims,
         expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     )
     
     return TokenResponse(
         access_token=token,
-        expires_in=ACCESS_TOKEN_EXPIRE_MINUTES * 60
+        expires_in=ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        refresh_token=create_refresh_token(data=claims),
     )
 
 
+@router.post("/register", response_model=TokenResponse)
+async def register(request: RegisterRequest):
+    try:
+        password_hash = await hash_password_async(request.password)
+    except PasswordHasherBusyError:
+        raise _hasher_busy()
+    
+    user_data = UserCreate(email=request.email.lower(), name=request.name)
+    try:
+        user = await run_in_threadpool(db.create, user_data)
+    except DuplicateEmailError:
+        raise HTTPException(status_code=409, detail="Email already registered")
+    
+    await run_in_threadpool(db.set_password_hash, user.id, password_hash)
+    
+    return await run_in_threadpool(_issue_tokens, user)
+
+
 @router.post("/login", response_model=TokenResponse)
 async def login(request: LoginRequest):
-    user = db.get_by_email(request.email.lower())
+    user = await run_in_threadpool(db.get_by_email, request.email.lower())
     if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
-    stored_hash = passwords_store.get(user.id)
-    if not stored_hash or not verify_password(request.password, stored_hash):
+    stored_hash = await run_in_threadpool(db.get_password_hash, user.id)
+    if not stored_hash:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    try:
+        valid = await verify_password_async(request.password, stored_hash)
+    except PasswordHasherBusyError:
+        raise _hasher_busy()
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
-    token = create_access_token(
-        data={"sub": str(user.id), "email": user.email},
-        expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    )
+    if needs_rehash(stored_hash):
+        # Upgrade to the current cost policy while the plaintext is at hand;
+        # if the hasher is saturated, keep the old hash and retry next login.
+        try:
+            password_hash = await hash_password_async(request.password)
+        except PasswordHasherBusyError:
+            pass
+        else:
+            await run_in_threadpool(db.set_password_hash, user.id, password_hash)
     
-    return TokenResponse(
-        access_token=token,
-        expires_in=ACCESS_TOKEN_EXPIRE_MINUTES * 60
-    )
+    return await run_in_threadpool(_issue_tokens, user)
+
+
+@router.post("/refresh", response_model=TokenResponse)
+def refresh(request: RefreshRequest):
+    # Revoking the presented token is what makes rotation single-use:
+    # a replayed or concurrently reused refresh token fails here.
+    payload = verify_token(request.refresh_token, token_type="refresh")
+    try:
+        revoked = payload is not None and revoke_token(payload)
+    except RevocationStoreFullError:
+        raise _revocation_full()
+    if not revoked:
+        raise HTTPException(status_code=401, detail="Invalid or expired refresh token")
+    
+    user = db.get_by_id(int(payload.get("sub", 0)))
+    if not user or not user.is_active:
+        raise HTTPException(status_code=401, detail="Invalid or expired refresh token")
+    
+    return _issue_tokens(user)
 
 
 @router.get("/me", response_model=AuthUser)
-async def get_current_user(payload: dict = Depends(require_auth)):
+def get_current_user(payload: dict = Depends(require_auth)):
     user_id = int(payload.get("sub", 0))
+    session = get_session(user_id)
+    if session is not None:
+        return session
+    
     user = db.get_by_id(user_id)
     
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    return AuthUser(
-        id=user.id,
-        email=user.email,
-        name=user.name,
-        is_active=user.is_active
-    )
+    return cache_session(user)
 
 
 @router.post("/logout")
-async def logout(payload: dict = Depends(require_auth)):
+def logout(
+    request: Optional[LogoutRequest] = None,
+    payload: dict = Depends(require_auth),
+):
+    try:
+        revoke_token(payload)
+        
+        if request and request.refresh_token:
+            refresh_payload = verify_token(request.refresh_token, token_type="refresh")
+            if refresh_payload and refresh_payload.get("sub") == payload.get("sub"):
+                revoke_token(refresh_payload)
+    except RevocationStoreFullError:
+        raise _revocation_full()
+    
     return {"message": "Successfully logged out"}
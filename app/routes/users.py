@@ -1,28 +1,302 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple, Union
 from datetime import datetime
+import json
 
-from app.models import User, UserCreate, UserResponse
-from app.db.users import UserDB
+from app.models import (
+    User,
+    UserCreate,
+    UserResponse,
+    UserListResponse,
+    BulkCreateResponse,
+    BulkItemError,
+    UserLookupRequest,
+    UserLookupResponse,
+    UserSearchResponse,
+)
+from app.db.users import DuplicateEmailError, get_user_store
+from app.cache.backend import cache
+from app.cache.keys import CacheKey
+from app.config.features import feature_flags
 
+# Store calls block (the SQLite store does disk I/O), so handlers that
+# only use the store are plain functions FastAPI runs on its threadpool,
+# and async ones hand store work to run_in_threadpool.
 router = APIRouter()
-db = UserDB()
+db = get_user_store()
+db.add_handler(lambda user_id: cache.delete(CacheKey.user(user_id)))
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+STREAM_CHUNK_SIZE = 500
+BULK_CHUNK_SIZE = 500
+MAX_QUERY_IDS = 200
+MAX_LOOKUP_IDS = 10000
 
-@router.get("/", response_model=List[User])
-async def list_users():
-    return db.get_all()
+_INVALID_JSON = object()
+
+
+class RawJSONResponse(Response):
+    """Response for bodies that are already encoded JSON bytes."""
+
+    media_type = "application/json"
+
+
+def _fast_path_enabled() -> bool:
+    return feature_flags.is_enabled("user_json_fast_path")
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def _user_etag(user_id: int, version: int) -> str:
+    return f'"user-{user_id}-v{version}"'
+
+
+def _collection_etag(version: int, variant: str) -> str:
+    return f'"users-v{version}-{variant}"'
+
+
+def _wants_ndjson(request: Request, format: Optional[str]) -> bool:
+    if format is not None:
+        return format == "ndjson"
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def _stream_users(chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    for chunk in db.iter_all(chunk_size):
+        yield b"".join(user.model_dump_json().encode() + b"\n" for user in chunk)
+
+
+def _stream_users_json(chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    after_id = 0
+    while True:
+        chunk = db.list_json_after(after_id, chunk_size)
+        if not chunk:
+            return
+        yield b"".join(data + b"\n" for _, data in chunk)
+        after_id = chunk[-1][0]
+
+
+def _user_page_body(after: int, limit: int) -> bytes:
+    page = db.list_json_after(after, limit)
+    next_cursor = str(page[-1][0]).encode() if len(page) == limit else b"null"
+    return (
+        b'{"success":true,"data":['
+        + b",".join(data for _, data in page)
+        + b'],"next_cursor":' + next_cursor + b"}"
+    )
+
+
+async def _iter_ndjson(request: Request) -> AsyncIterator[Any]:
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if buffer.strip():
+        yield buffer
+
+
+async def _iter_bulk_items(request: Request) -> AsyncIterator[Tuple[int, Any]]:
+    if NDJSON_MEDIA_TYPE in request.headers.get("content-type", ""):
+        index = 0
+        async for line in _iter_ndjson(request):
+            try:
+                yield index, json.loads(line)
+            except ValueError:
+                yield index, _INVALID_JSON
+            index += 1
+        return
+
+    try:
+        items = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+    for index, item in enumerate(items):
+        yield index, item
+
+
+def _insert_chunk(chunk: List[Tuple[int, Any]], result: BulkCreateResponse) -> None:
+    valid: List[Tuple[int, UserCreate]] = []
+    for index, item in chunk:
+        if item is _INVALID_JSON:
+            result.errors.append(BulkItemError(index=index, error="Invalid JSON"))
+            continue
+        try:
+            valid.append((index, UserCreate.model_validate(item)))
+        except ValidationError as e:
+            error = e.errors()[0]
+            location = ".".join(str(part) for part in error["loc"])
+            message = f"{location}: {error['msg']}" if location else error["msg"]
+            result.errors.append(BulkItemError(index=index, error=message))
+
+    created = db.create_many([user for _, user in valid])
+    for (index, _), user in zip(valid, created):
+        if user is None:
+            result.errors.append(BulkItemError(index=index, error="Email already registered"))
+        else:
+            result.created += 1
+
+
+def _parse_ids(raw: str) -> List[int]:
+    try:
+        return [int(part) for part in raw.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(status_code=422, detail="ids must be a comma-separated list of integers")
+
+
+def _lookup_users(user_ids: List[int]) -> UserLookupResponse:
+    """
+    Resolve ids through the cache first, then fetch every miss from the
+    store in one batch and backfill the cache. Results keep request order;
+    unknown ids are returned as null and listed in ``missing``.
+    """
+    keys = {user_id: CacheKey.user(user_id) for user_id in user_ids}
+    cached_users = cache.get_many(list(keys.values()))
+    found: Dict[int, User] = {
+        user_id: cached_users[key] for user_id, key in keys.items() if key in cached_users
+    }
+
+    misses = [user_id for user_id in keys if user_id not in found]
+    if misses:
+        loaded = db.get_many(misses)
+        if loaded:
+            cache.set_many({keys[user_id]: user for user_id, user in loaded.items()})
+        found.update(loaded)
+
+    data = [found.get(user_id) for user_id in user_ids]
+    missing = [user_id for user_id in user_ids if user_id not in found]
+    return UserLookupResponse(success=True, data=data, missing=missing)
+
+
+@router.get("/", response_model=Union[UserListResponse, UserLookupResponse])
+def list_users(
+    request: Request,
+    response: Response,
+    ids: Optional[str] = Query(None, description="Comma-separated ids to fetch in one call"),
+    after: int = Query(0, ge=0, description="Return users with id greater than this cursor"),
+    limit: int = Query(100, ge=1, le=1000),
+    format: Optional[str] = Query(None, pattern="^(json|ndjson)$"),
+):
+    if ids is not None:
+        user_ids = _parse_ids(ids)
+        if len(user_ids) > MAX_QUERY_IDS:
+            raise HTTPException(
+                status_code=422,
+                detail=f"At most {MAX_QUERY_IDS} ids per GET; use POST /users/lookup",
+            )
+        return _lookup_users(user_ids)
+
+    # The version is read before the data so a concurrent write can only
+    # make the ETag older than the body, never newer.
+    ndjson = _wants_ndjson(request, format)
+    # A JSON page depends on its cursor and size; the NDJSON stream is the
+    # whole collection regardless.
+    variant = "ndjson" if ndjson else f"json-a{after}-l{limit}"
+    etag = _collection_etag(db.collection_version(), variant)
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    fast_path = _fast_path_enabled()
+    if ndjson:
+        stream = _stream_users_json() if fast_path else _stream_users()
+        return StreamingResponse(stream, media_type=NDJSON_MEDIA_TYPE, headers={"ETag": etag})
+
+    if fast_path:
+        return RawJSONResponse(_user_page_body(after, limit), headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
+    users = db.list_after(after, limit)
+    next_cursor = users[-1].id if len(users) == limit else None
+    return UserListResponse(success=True, data=users, next_cursor=next_cursor)
+
+
+@router.post("/lookup", response_model=UserLookupResponse)
+def lookup_users(body: UserLookupRequest):
+    if len(body.ids) > MAX_LOOKUP_IDS:
+        raise HTTPException(status_code=422, detail=f"At most {MAX_LOOKUP_IDS} ids per lookup")
+    return _lookup_users(body.ids)
+
+
+@router.get("/search", response_model=UserSearchResponse)
+def search_users(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=100),
+):
+    users = db.search(q, limit + 1, offset)
+    next_offset = offset + limit if len(users) > limit else None
+    return UserSearchResponse(success=True, data=users[:limit], next_offset=next_offset)
 
 
 @router.get("/{user_id}", response_model=UserResponse)
-async def get_user(user_id: int):
+def get_user(user_id: int, request: Request, response: Response):
+    version = db.get_version(user_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    etag = _user_etag(user_id, version)
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    if _fast_path_enabled():
+        data = db.get_json(user_id)
+        if data is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        body = b'{"success":true,"data":' + data + b',"error":null}'
+        return RawJSONResponse(body, headers={"ETag": etag})
+
     user = db.get_by_id(user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    response.headers["ETag"] = etag
     return UserResponse(success=True, data=user)
 
 
 @router.post("/", response_model=UserResponse)
-async def create_user(user: UserCreate):
-    new_user = db.create(user)
+def create_user(user: UserCreate):
+    try:
+        new_user = db.create(user)
+    except DuplicateEmailError:
+        raise HTTPException(status_code=409, detail="Email already registered")
     return UserResponse(success=True, data=new_user)
+
+
+@router.post("/bulk", response_model=BulkCreateResponse)
+async def bulk_create_users(request: Request):
+    """
+    Create many users from a JSON array or an NDJSON stream of UserCreate.
+
+    Items are validated and inserted BULK_CHUNK_SIZE at a time; invalid or
+    duplicate items are reported by index without aborting the batch.
+    """
+    result = BulkCreateResponse(success=True)
+    chunk: List[Tuple[int, Any]] = []
+
+    async for item in _iter_bulk_items(request):
+        chunk.append(item)
+        if len(chunk) >= BULK_CHUNK_SIZE:
+            await run_in_threadpool(_insert_chunk, chunk, result)
+            chunk = []
+    if chunk:
+        await run_in_threadpool(_insert_chunk, chunk, result)
+
+    result.errors.sort(key=lambda error: error.index)
+    result.failed = len(result.errors)
+    result.success = result.failed == 0
+    return result
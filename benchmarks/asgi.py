@@ -0,0 +1,84 @@
+"""
+Minimal in-process ASGI driver for request-level benchmarks.
+
+Calls the application directly with a synthetic HTTP scope, so the
+numbers cover middleware, routing, validation and serialization but no
+socket or HTTP parsing overhead.
+"""
+import asyncio
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+from app.middleware.rate_limit import install_policies, rate_limiter, sliding_rate_limiter
+
+
+def lift_rate_limits(app) -> None:
+    """Raise the global limits and drop per-route policies, for benchmarks of other things."""
+    rate_limiter.requests_per_minute = sys.maxsize
+    sliding_rate_limiter.requests_per_minute = sys.maxsize
+    install_policies(app.routes, rules=())
+
+
+def _scope(method: str, path: str, headers: Dict[str, str], client: Tuple[str, int]) -> dict:
+    path, _, query = path.partition("?")
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+        "client": client,
+        "server": ("testserver", 80),
+    }
+
+
+async def request(
+    app,
+    method: str,
+    path: str,
+    headers: Optional[Dict[str, str]] = None,
+    body: bytes = b"",
+    client: Tuple[str, int] = ("127.0.0.1", 50000),
+) -> Tuple[int, Dict[str, str], bytes]:
+    messages: List[dict] = []
+    sent = False
+
+    async def receive() -> dict:
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await asyncio.sleep(3600)
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict) -> None:
+        messages.append(message)
+
+    await app(_scope(method, path, headers or {}, client), receive, send)
+
+    start = next(m for m in messages if m["type"] == "http.response.start")
+    response_headers = {k.decode(): v.decode() for k, v in start.get("headers", [])}
+    content = b"".join(m.get("body", b"") for m in messages if m["type"] == "http.response.body")
+    return start["status"], response_headers, content
+
+
+async def requests_per_second(
+    app,
+    method: str,
+    path: str,
+    count: int,
+    headers: Optional[Dict[str, str]] = None,
+) -> float:
+    for _ in range(min(count, 100)):
+        await request(app, method, path, headers)
+
+    start = time.perf_counter()
+    for _ in range(count):
+        await request(app, method, path, headers)
+    return count / (time.perf_counter() - start)
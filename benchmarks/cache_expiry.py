@@ -0,0 +1,76 @@
+"""
+MemoryCache entry footprint and expiry sweep cost.
+
+    python -m benchmarks.cache_expiry [--entries 100000]
+
+Memory per entry is measured with tracemalloc for the current __slots__
+CacheEntry on the monotonic clock and for the previous dict-backed entry
+holding datetimes. The sweep fills a cache with entries that expire almost
+at once and times each SWEEP_BATCH under the lock, then the whole pass.
+"""
+import argparse
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from app.cache.backend import CacheEntry, MemoryCache
+
+
+class DatetimeCacheEntry:
+    def __init__(self, value, expires_at=None):
+        self.value = value
+        self.expires_at = expires_at
+        self.created_at = datetime.utcnow()
+        self.access_count = 0
+
+
+def bytes_per_entry(make, count: int) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    entries = [make(i) for i in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del entries
+    return (after - before) / count
+
+
+def sweep_cost(count: int) -> None:
+    cache = MemoryCache(max_size=count, default_ttl=300)
+    for i in range(count):
+        cache.set(f"key:{i}", i, ttl=0.05)
+    time.sleep(0.1)
+
+    batches = []
+    start = time.perf_counter()
+    while True:
+        batch_start = time.perf_counter()
+        removed = cache.sweep()
+        batches.append(time.perf_counter() - batch_start)
+        if removed < cache.SWEEP_BATCH:
+            break
+    total = time.perf_counter() - start
+
+    print(f"swept {count} entries in {len(batches)} batches of {cache.SWEEP_BATCH}")
+    print(f"  total {total * 1000:.1f} ms, {total / count * 1e6:.2f} µs/entry")
+    print(f"  lock held per batch: max {max(batches) * 1000:.3f} ms, "
+          f"avg {sum(batches) / len(batches) * 1000:.3f} ms")
+    print(f"  left: {cache.stats()['size']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=100000)
+    args = parser.parse_args()
+
+    now = time.monotonic()
+    utcnow = datetime.utcnow()
+    slots = bytes_per_entry(lambda i: CacheEntry(i, now + 300, now), args.entries)
+    legacy = bytes_per_entry(lambda i: DatetimeCacheEntry(i, utcnow + timedelta(seconds=300)), args.entries)
+    print("bytes per entry")
+    print(f"  dict + datetime  {legacy:>7.1f}")
+    print(f"  slots + float    {slots:>7.1f}")
+    sweep_cost(args.entries)
+
+
+if __name__ == "__main__":
+    main()
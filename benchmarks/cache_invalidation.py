@@ -0,0 +1,64 @@
+"""
+Cost of tag and prefix invalidation as the cache grows.
+
+    python -m benchmarks.cache_invalidation [--sizes 10000 100000 1000000] [--tagged 10]
+
+Fills a MemoryCache with keys in 100 namespaces, each key tagged with one
+of size / --tagged tags, so every tag names --tagged keys. Times
+invalidate_tag and invalidate_prefix against the old approach, a substring
+scan over every key, along with set cost with and without tags.
+"""
+import argparse
+import time
+
+from app.cache.backend import MemoryCache
+
+
+def scan_invalidate(cache: MemoryCache, pattern: str) -> int:
+    keys = [key for key in list(cache._cache.keys()) if pattern in key]
+    for key in keys:
+        cache.delete(key)
+    return len(keys)
+
+
+def timed(fn, *args) -> tuple:
+    start = time.perf_counter()
+    count = fn(*args)
+    return (time.perf_counter() - start) * 1e6, count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--tagged", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'size':>9} {'set µs':>7} {'tagged set µs':>14} {'operation':<18} {'deleted':>8} {'µs':>10}")
+    for size in args.sizes:
+        tags = size // args.tagged
+
+        plain = MemoryCache(max_size=size, default_ttl=300)
+        start = time.perf_counter()
+        for i in range(size):
+            plain.set(f"ns{i % 100}:{i}", i)
+        set_us = (time.perf_counter() - start) / size * 1e6
+        del plain
+
+        cache = MemoryCache(max_size=size, default_ttl=300)
+        start = time.perf_counter()
+        for i in range(size):
+            cache.set(f"ns{i % 100}:{i}", i, tags=(f"owner:{i % tags}",))
+        tagged_us = (time.perf_counter() - start) / size * 1e6
+
+        results = [
+            ("invalidate_tag",) + timed(cache.invalidate_tag, "owner:1"),
+            ("invalidate_prefix",) + timed(cache.invalidate_prefix, "ns7:"),
+            ("scan (old)",) + timed(scan_invalidate, cache, "ns8:"),
+        ]
+        for i, (name, us, count) in enumerate(results):
+            lead = f"{size:>9} {set_us:>7.2f} {tagged_us:>14.2f}" if i == 0 else " " * 32
+            print(f"{lead} {name:<18} {count:>8} {us:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
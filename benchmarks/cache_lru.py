@@ -0,0 +1,60 @@
+"""
+MemoryCache set/get cost once the cache is full.
+
+    python -m benchmarks.cache_lru [--sizes 1000 100000 1000000] [--ops 100000]
+
+Each cache is filled to max_size, then timed for sets of new keys (each
+one evicting) and for gets of resident keys. "scan" reproduces the old
+eviction, a min() over every entry's creation time, so its set cost grows
+with the cache; it is sampled with fewer operations at large sizes.
+"""
+import argparse
+import time
+
+from app.cache.backend import MemoryCache
+
+
+class ScanEvictionCache(MemoryCache):
+    def _evict(self, now: float) -> None:
+        oldest = min(self._cache, key=lambda k: self._cache[k].created_at)
+        self._remove(oldest)
+        self._evictions += 1
+
+
+def measure(cache_cls, size: int, ops: int) -> tuple:
+    cache = cache_cls(max_size=size, default_ttl=300)
+    for i in range(size):
+        cache.set(f"key:{i}", i)
+
+    start = time.perf_counter()
+    for i in range(ops):
+        cache.set(f"new:{i}", i)
+    set_us = (time.perf_counter() - start) / ops * 1e6
+
+    resident = [f"key:{i}" for i in range(size - 1, max(-1, size - 1 - ops), -1)]
+    resident = [key for key in resident if cache.exists(key)] or [f"new:{ops - 1}"]
+    start = time.perf_counter()
+    for i in range(ops):
+        cache.get(resident[i % len(resident)])
+    get_us = (time.perf_counter() - start) / ops * 1e6
+    return set_us, get_us, cache.stats()["evictions"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000, 1000000])
+    parser.add_argument("--ops", type=int, default=100000)
+    args = parser.parse_args()
+
+    print(f"{'size':>9} {'eviction':<9} {'ops':>7} {'set µs':>10} {'get µs':>8} {'evicted':>8}")
+    for size in args.sizes:
+        for name, cache_cls, ops in (
+            ("scan", ScanEvictionCache, max(10, min(args.ops, 20_000_000 // size))),
+            ("lru", MemoryCache, args.ops),
+        ):
+            set_us, get_us, evictions = measure(cache_cls, size, ops)
+            print(f"{size:>9} {name:<9} {ops:>7} {set_us:>10.2f} {get_us:>8.2f} {evictions:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Caller latency for a hot @cached working set as entries expire.
+
+    python -m benchmarks.cache_refresh [--seconds 4] [--workers 50] [--keys 20]
+
+Async workers hammer a few keys whose loader takes --load-ms, with a TTL
+short enough that every key expires several times during the run. With
+plain expiry the callers that hit an expired key wait for the reload
+(coalesced, but still blocking); stale_ttl serves the old value while one
+background refresh runs; refresh_ahead (XFetch) refreshes most keys before
+they expire at all.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from app.cache.backend import cache
+from app.cache.decorators import cached, refresher
+
+MODES = {
+    "expire": {},
+    "stale_ttl": {"stale_ttl": 5},
+    "refresh_ahead": {"refresh_ahead": 1.0},
+}
+
+
+async def run(options: dict, seconds: float, workers: int, keys: int, ttl: float, load_seconds: float) -> tuple:
+    loads = 0
+
+    @cached(prefix=f"refresh_bench_{id(options)}", ttl=ttl, **options)
+    async def load(key: int) -> int:
+        nonlocal loads
+        loads += 1
+        await asyncio.sleep(load_seconds)
+        return key
+
+    samples = []
+    deadline = time.perf_counter() + seconds
+
+    async def worker() -> None:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            await load(random.randrange(keys))
+            samples.append((time.perf_counter() - start) * 1000)
+            await asyncio.sleep(0.001)
+
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    return samples, loads
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=4)
+    parser.add_argument("--workers", type=int, default=50)
+    parser.add_argument("--keys", type=int, default=20)
+    parser.add_argument("--ttl", type=float, default=0.5)
+    parser.add_argument("--load-ms", type=float, default=50)
+    args = parser.parse_args()
+
+    print(f"{'mode':<14} {'calls':>8} {'loads':>6} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for name, options in MODES.items():
+        cache.clear()
+        samples, loads = asyncio.run(
+            run(options, args.seconds, args.workers, args.keys, args.ttl, args.load_ms / 1000)
+        )
+        samples.sort()
+        p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+        print(
+            f"{name:<14} {len(samples):>8} {loads:>6} {statistics.median(samples):>8.3f} "
+            f"{p99:>8.3f} {samples[-1]:>8.3f}"
+        )
+    print(f"refresher stats: {refresher.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Loader calls when many callers miss the same @cached key at once.
+
+    python -m benchmarks.cache_stampede [--callers 200] [--load-ms 20]
+
+Expires one hot key and releases every caller together, async on one event
+loop and sync on a thread pool. "uncoalesced" bypasses single-flight, the
+old behaviour, where each caller runs its own load.
+"""
+import argparse
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.cache import decorators
+from app.cache.backend import cache
+from app.cache.decorators import cached
+from app.cache.singleflight import single_flight
+
+
+class Uncoalesced:
+    def do(self, key, fn):
+        return fn()
+
+    async def do_async(self, key, fn):
+        return await fn()
+
+
+def run(callers: int, load_seconds: float) -> dict:
+    loads = {"async": 0, "sync": 0}
+    lock = threading.Lock()
+
+    @cached(prefix="stampede_async", ttl=60)
+    async def load_async(key: str) -> str:
+        loads["async"] += 1
+        await asyncio.sleep(load_seconds)
+        return f"value:{key}"
+
+    @cached(prefix="stampede_sync", ttl=60)
+    def load_sync(key: str) -> str:
+        with lock:
+            loads["sync"] += 1
+        time.sleep(load_seconds)
+        return f"value:{key}"
+
+    cache.clear()
+
+    async def burst() -> None:
+        await asyncio.gather(*(load_async("hot") for _ in range(callers)))
+
+    start = time.perf_counter()
+    asyncio.run(burst())
+    async_ms = (time.perf_counter() - start) * 1000
+
+    barrier = threading.Barrier(min(callers, 64))
+
+    def call(_) -> str:
+        barrier.wait()
+        return load_sync("hot")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=min(callers, 64)) as pool:
+        list(pool.map(call, range(min(callers, 64))))
+    sync_ms = (time.perf_counter() - start) * 1000
+    return {"async": (loads["async"], async_ms), "sync": (loads["sync"], sync_ms)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--callers", type=int, default=200)
+    parser.add_argument("--load-ms", type=float, default=20)
+    args = parser.parse_args()
+
+    print(f"{'mode':<12} {'wrapper':<6} {'callers':>8} {'loads':>6} {'ms':>8}")
+    for name, flight in (("uncoalesced", Uncoalesced()), ("coalesced", single_flight)):
+        decorators.single_flight = flight
+        single_flight.reset_stats()
+        results = run(args.callers, args.load_ms / 1000)
+        for wrapper, (loads, ms) in results.items():
+            callers = args.callers if wrapper == "async" else min(args.callers, 64)
+            print(f"{name:<12} {wrapper:<6} {callers:>8} {loads:>6} {ms:>8.1f}")
+    print(f"single_flight stats: {single_flight.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Login latency at each PBKDF2 cost level.
+
+    python -m benchmarks.login_cost [--iterations 25000,50000,100000,200000]
+                                    [--target-ms 50] [--logins 200] [--concurrency 16]
+
+For every cost level the policy is switched, a fresh user is registered
+(so its hash is stored at that cost) and a burst of concurrent logins is
+timed end to end through the app. With --target-ms the calibrated cost for
+that budget on this host is added to the list.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Tuple
+
+from app.auth import password
+from app.main import app
+from benchmarks.asgi import lift_rate_limits, request
+
+PASSWORD = "correct horse battery staple"
+HEADERS = {"content-type": "application/json"}
+
+
+async def run_level(iterations: int, logins: int, concurrency: int) -> Tuple[list, float]:
+    password.set_iterations(iterations)
+    email = f"cost{iterations}@example.com"
+    await request(
+        app, "POST", "/auth/register", HEADERS,
+        json.dumps({"email": email, "password": PASSWORD, "name": "Cost"}).encode(),
+    )
+
+    body = json.dumps({"email": email, "password": PASSWORD}).encode()
+    semaphore = asyncio.Semaphore(concurrency)
+    samples: list = []
+
+    async def login() -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            status, _, _ = await request(app, "POST", "/auth/login", HEADERS, body)
+            samples.append((time.perf_counter() - start) * 1000)
+            assert status == 200, status
+
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    return samples, logins / elapsed
+
+
+async def main(levels: list, logins: int, concurrency: int) -> None:
+    print(f"{'iterations':>10} {'p50 ms':>9} {'p99 ms':>9} {'logins/s':>9}")
+    for iterations in levels:
+        samples, rate = await run_level(iterations, logins, concurrency)
+        samples.sort()
+        p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+        print(f"{iterations:>10} {statistics.median(samples):>9.2f} {p99:>9.2f} {rate:>9.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", default="25000,50000,100000,200000")
+    parser.add_argument("--target-ms", type=float, default=None)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    levels = [int(value) for value in args.iterations.split(",") if value]
+    if args.target_ms:
+        calibrated = password.calibrate_iterations(args.target_ms)
+        print(f"calibrated {calibrated} iterations for {args.target_ms} ms")
+        levels.append(calibrated)
+
+    lift_rate_limits(app)
+    asyncio.run(main(sorted(set(levels)), args.logins, args.concurrency))
@@ -0,0 +1,96 @@
+"""
+/health latency while a burst of logins is in flight.
+
+    python -m benchmarks.login_storm [--logins 200] [--concurrency 50]
+
+Runs the storm twice: once with PBKDF2 executed inline on the event loop
+(the old behaviour) and once through the bounded password hasher pool. With
+the pool, /health latency should stay close to its idle baseline.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from app.auth import password
+from app.main import app
+from app.routes import auth as auth_routes
+from benchmarks.asgi import lift_rate_limits, request
+
+EMAIL = "storm@example.com"
+PASSWORD = "correct horse battery staple"
+
+
+async def _inline_verify(plain: str, stored_hash: str) -> bool:
+    return password.verify_password(plain, stored_hash)
+
+
+async def probe_health(stop: asyncio.Event, samples: list) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await request(app, "GET", "/health")
+        samples.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(0.005)
+
+
+async def storm(logins: int, concurrency: int) -> list:
+    body = json.dumps({"email": EMAIL, "password": PASSWORD}).encode()
+    headers = {"content-type": "application/json"}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def login() -> None:
+        async with semaphore:
+            status, _, _ = await request(app, "POST", "/auth/login", headers, body)
+            assert status == 200, status
+
+    samples: list = []
+    stop = asyncio.Event()
+    prober = asyncio.create_task(probe_health(stop, samples))
+    await asyncio.gather(*(login() for _ in range(logins)))
+    stop.set()
+    await prober
+    return samples
+
+
+async def idle(duration: float = 0.5) -> list:
+    samples: list = []
+    stop = asyncio.Event()
+    prober = asyncio.create_task(probe_health(stop, samples))
+    await asyncio.sleep(duration)
+    stop.set()
+    await prober
+    return samples
+
+
+def summarize(name: str, samples: list) -> None:
+    samples = sorted(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(f"{name:<14} {len(samples):>8} {statistics.median(samples):>9.2f} {p99:>9.2f} {samples[-1]:>9.2f}")
+
+
+async def main(logins: int, concurrency: int) -> None:
+    status, _, _ = await request(
+        app, "POST", "/auth/register", {"content-type": "application/json"},
+        json.dumps({"email": EMAIL, "password": PASSWORD, "name": "Storm"}).encode(),
+    )
+    assert status == 200, status
+
+    print(f"{'mode':<14} {'samples':>8} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    summarize("idle", await idle())
+
+    pooled = auth_routes.verify_password_async
+    auth_routes.verify_password_async = _inline_verify
+    summarize("inline pbkdf2", await storm(logins, concurrency))
+    auth_routes.verify_password_async = pooled
+    summarize("hasher pool", await storm(logins, concurrency))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    lift_rate_limits(app)
+    asyncio.run(main(args.logins, args.concurrency))
@@ -0,0 +1,108 @@
+"""
+Per-request middleware overhead on /health and /users.
+
+    python -m benchmarks.middleware_overhead [--users 100] [--requests 3000]
+
+Builds the same app three ways: with no middleware, with the rate limit and
+audit middleware behind BaseHTTPMiddleware (the old wiring, reproduced
+here), and with the pure ASGI versions. Overhead is the extra time per
+request relative to the bare app.
+"""
+import argparse
+import asyncio
+import sys
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.audit import AuditMiddleware, audit_logger
+from app.middleware.rate_limit import (
+    RateLimitMiddleware,
+    get_rate_limiter,
+    install_policies,
+    rate_limit_headers,
+    rate_limit_key,
+    rate_limiter,
+    sliding_rate_limiter,
+)
+from app.middleware import rate_limit
+from app.models import UserCreate
+from app.routes import auth, health, users
+from benchmarks.asgi import requests_per_second
+
+PATHS = ["/health", "/users/?limit=20"]
+
+
+async def legacy_rate_limit(request: Request, call_next):
+    policy = rate_limit.policy_table.resolve(request.method, request.scope["path"])
+    if policy.exempt:
+        return await call_next(request)
+    limiter = get_rate_limiter()
+    result = limiter.check(
+        rate_limit_key(request, limiter, policy), policy.cost, policy.requests_per_minute
+    )
+    headers = rate_limit_headers(result)
+    if not result.allowed:
+        return JSONResponse(status_code=429, content={"detail": "Rate limit exceeded."}, headers=headers)
+    response = await call_next(request)
+    response.headers.update(headers)
+    return response
+
+
+def legacy_audit(audit: AuditMiddleware):
+    async def dispatch(request: Request, call_next):
+        if request.url.path.startswith(audit.EXCLUDED_PATHS):
+            return await call_next(request)
+        client_ip = audit._get_client_ip(request)
+        user_id = audit._get_user_id(request)
+        response = await call_next(request)
+        audit._log_api_event(request, response.status_code, client_ip, user_id, 0.0, "legacy")
+        return response
+    return dispatch
+
+
+def build_app(wiring: str) -> FastAPI:
+    app = FastAPI()
+    if wiring == "base_http":
+        app.add_middleware(BaseHTTPMiddleware, dispatch=legacy_audit(AuditMiddleware(app)))
+        app.add_middleware(BaseHTTPMiddleware, dispatch=legacy_rate_limit)
+    elif wiring == "asgi":
+        app.add_middleware(AuditMiddleware)
+        app.add_middleware(RateLimitMiddleware)
+    app.include_router(health.router)
+    app.include_router(auth.router, prefix="/auth")
+    app.include_router(users.router, prefix="/users")
+    install_policies(app.routes)
+    return app
+
+
+async def run(requests: int) -> None:
+    apps = {wiring: build_app(wiring) for wiring in ("none", "base_http", "asgi")}
+    print(f"{'path':<18} {'wiring':<10} {'req/s':>9} {'µs/req':>8} {'overhead µs':>12}")
+    for path in PATHS:
+        baseline = None
+        for wiring, app in apps.items():
+            rps = await requests_per_second(app, "GET", path, requests)
+            audit_logger.clear()
+            per_request = 1e6 / rps
+            baseline = baseline or per_request
+            print(f"{path:<18} {wiring:<10} {rps:>9.0f} {per_request:>8.1f} {per_request - baseline:>12.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=3000)
+    args = parser.parse_args()
+
+    rate_limiter.requests_per_minute = sys.maxsize
+    sliding_rate_limiter.requests_per_minute = sys.maxsize
+    users.db.create_many([
+        UserCreate(email=f"user{i}@example.com", name=f"User {i}") for i in range(args.users)
+    ])
+    asyncio.run(run(args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Per-check cost of each rate limit backend, and whether the limit holds
+across worker processes.
+
+    python -m benchmarks.rate_limit_backends [--checks 200000] [--clients 10000]
+                                             [--workers 4] [--limit 100]
+
+The RESP backend runs against the in-process stand-in server from
+tests.resp_server unless --redis-url points at a real one. The
+sharing test forks --workers processes that all hit one client id; with a
+shared backend the total number of allowed requests stays at --limit
+instead of workers x limit.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+from app.middleware.rate_limit import SlidingWindowRateLimiter
+from app.middleware.rate_limit_backends import (
+    MemoryRateLimitBackend,
+    MmapRateLimitBackend,
+    RESPRateLimitBackend,
+)
+from tests import resp_server
+
+
+def backend_factories(redis_url: str, path: str) -> list:
+    return [
+        ("memory", lambda: MemoryRateLimitBackend()),
+        ("mmap", lambda: MmapRateLimitBackend(path)),
+        ("resp", lambda: RESPRateLimitBackend(redis_url)),
+    ]
+
+
+def per_check(factory, checks: int, clients: int, limit: int) -> float:
+    limiter = SlidingWindowRateLimiter(limit, backend=factory())
+    rng = random.Random(7)
+    ids = [f"client-{rng.randrange(clients)}" for _ in range(checks)]
+    started = time.perf_counter()
+    for client_id in ids:
+        limiter.check(client_id)
+    elapsed = time.perf_counter() - started
+    limiter.backend.close()
+    return elapsed / checks * 1e6
+
+
+def _worker(factory, client_id: str, attempts: int, limit: int, results) -> None:
+    limiter = SlidingWindowRateLimiter(limit, backend=factory())
+    results.put(sum(limiter.check(client_id).allowed for _ in range(attempts)))
+
+
+def shared_total(factory, workers: int, limit: int) -> int:
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    client_id = f"shared-{time.time_ns()}"
+    processes = [
+        context.Process(target=_worker, args=(factory, client_id, limit * 2, limit, results))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    total = sum(results.get() for _ in processes)
+    for process in processes:
+        process.join()
+    return total
+
+
+def main(args) -> None:
+    redis_url = args.redis_url
+    if not redis_url:
+        host, port = resp_server.start_in_thread()
+        redis_url = f"redis://{host}:{port}/0"
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "rate-limit.bin")
+        print(f"{'backend':<8} {'us/check':>9} {'allowed':>8} {'(limit ' + str(args.limit) + ', ' + str(args.workers) + ' workers)'}")
+        for name, factory in backend_factories(redis_url, path):
+            checks = args.checks if name != "resp" else max(1, args.checks // 10)
+            cost = per_check(factory, checks, args.clients, args.limit)
+            allowed = shared_total(factory, args.workers, args.limit)
+            print(f"{name:<8} {cost:>9.2f} {allowed:>8}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--checks", type=int, default=200000)
+    parser.add_argument("--clients", type=int, default=10000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--redis-url", default=None)
+    main(parser.parse_args())
@@ -0,0 +1,73 @@
+"""
+Per-request cost and memory of the rate limiter implementations.
+
+    python -m benchmarks.rate_limiter [--clients 10000,100000] [--requests 1000000]
+                                      [--limit 60]
+
+Requests are spread uniformly at random over the client population, so
+with 10k clients every client quickly sits at the limit (the worst case
+for the timestamp-list limiter), while with 100k clients most stay below
+it. Memory is the traced allocation held by the limiter after the run;
+limiter state is capped at 100k clients, so larger populations evict.
+"""
+import argparse
+import random
+import time
+import tracemalloc
+
+from app.middleware.rate_limit import (
+    RateLimiter,
+    SlidingWindowRateLimiter,
+    TokenBucketRateLimiter,
+)
+
+LIMITERS = [
+    ("timestamp list", RateLimiter),
+    ("sliding counter", SlidingWindowRateLimiter),
+    ("token bucket", TokenBucketRateLimiter),
+]
+
+
+def run(factory, clients: list, stream: list, limit: int) -> tuple:
+    limiter = factory(requests_per_minute=limit)
+    is_allowed = limiter.is_allowed
+    started = time.perf_counter()
+    for index in stream:
+        is_allowed(clients[index])
+    elapsed = time.perf_counter() - started
+    return elapsed / len(stream) * 1e6, limiter.stats()
+
+
+def memory(factory, clients: list, stream: list, limit: int) -> float:
+    tracemalloc.start()
+    limiter = factory(requests_per_minute=limit)
+    for index in stream:
+        limiter.is_allowed(clients[index])
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current / 1024 / 1024
+
+
+def main(populations: list, requests: int, limit: int) -> None:
+    rng = random.Random(42)
+    print(f"{'clients':>8} {'limiter':<16} {'us/req':>8} {'MiB':>8} {'tracked':>8} {'evicted':>8}")
+    for population in populations:
+        clients = [f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(population)]
+        stream = [rng.randrange(population) for _ in range(requests)]
+        for name, factory in LIMITERS:
+            per_request, stats = run(factory, clients, stream, limit)
+            mib = memory(factory, clients, stream, limit)
+            print(
+                f"{population:>8} {name:<16} {per_request:>8.2f} {mib:>8.1f} "
+                f"{stats['tracked_clients']:>8} {stats['evictions']:>8}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", default="10000,100000")
+    parser.add_argument("--requests", type=int, default=1000000)
+    parser.add_argument("--limit", type=int, default=60)
+    args = parser.parse_args()
+
+    main([int(value) for value in args.clients.split(",") if value], args.requests, args.limit)
@@ -0,0 +1,63 @@
+"""
+RESPCache against the local stand-in server.
+
+    python -m benchmarks.resp_cache [--keys 100] [--rounds 200] [--threads 8]
+
+Times get_many/set_many pipelined against the same keys fetched one by
+one, and pooled throughput from several threads. The end-to-end checks
+live in tests/test_resp_cache.py.
+"""
+import argparse
+import threading
+import time
+
+from app.cache.backend import RESPCache
+from tests.resp_server import start_in_thread
+
+
+def bench(url: str, keys: int, rounds: int, threads: int) -> None:
+    cache = RESPCache(url, default_ttl=60, max_connections=threads)
+    names = [f"bench:{i}" for i in range(keys)]
+    values = {name: {"id": i, "name": name} for i, name in enumerate(names)}
+
+    def timed(fn) -> float:
+        start = time.perf_counter()
+        for _ in range(rounds):
+            fn()
+        return (time.perf_counter() - start) / rounds * 1000
+
+    print(f"{keys} keys, ms per batch")
+    print(f"  set one by one  {timed(lambda: [cache.set(n, v) for n, v in values.items()]):>8.2f}")
+    print(f"  set_many        {timed(lambda: cache.set_many(values)):>8.2f}")
+    print(f"  get one by one  {timed(lambda: [cache.get(n) for n in names]):>8.2f}")
+    print(f"  get_many        {timed(lambda: cache.get_many(names)):>8.2f}")
+
+    def worker() -> None:
+        for i in range(rounds * 10):
+            cache.get(names[i % keys])
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    print(f"  {threads} threads, pool of {threads}: {threads * rounds * 10 / elapsed:,.0f} gets/s")
+    cache.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--keys", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    host, port = start_in_thread()
+    url = f"redis://{host}:{port}/0"
+    bench(url, args.keys, args.rounds, args.threads)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Users/sec for one-at-a-time creates versus the batched create_many path.
+
+    python -m benchmarks.user_bulk_create [--users 20000] [--chunk 500]
+
+Both paths include pydantic validation of the raw payloads, mirroring what
+POST /users and POST /users/bulk do per item.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+_db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+os.environ.setdefault("DATABASE_URL", _db_file.name)
+
+from app.database.connection import db_pool  # noqa: E402
+from app.db.repository import UserRepository  # noqa: E402
+from app.db.users import UserDB  # noqa: E402
+from app.models import UserCreate  # noqa: E402
+
+
+def single(store, payloads, chunk: int) -> None:
+    for payload in payloads:
+        store.create(UserCreate.model_validate(payload))
+
+
+def bulk(store, payloads, chunk: int) -> None:
+    for start in range(0, len(payloads), chunk):
+        batch = [UserCreate.model_validate(p) for p in payloads[start:start + chunk]]
+        store.create_many(batch)
+
+
+def reset_sqlite() -> UserRepository:
+    repository = UserRepository()
+    with db_pool.connection() as conn:
+        conn.execute("DELETE FROM users")
+        conn.commit()
+    return repository
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--chunk", type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"{'store':>8} {'mode':>8} {'users/s':>12}")
+    for store_name, factory in (("memory", UserDB), ("sqlite", reset_sqlite)):
+        for mode, fn in (("single", single), ("bulk", bulk)):
+            payloads = [
+                {"email": f"{mode}{i}@example.com", "name": f"User {i}"}
+                for i in range(args.users)
+            ]
+            store = factory()
+            start = time.perf_counter()
+            fn(store, payloads, args.chunk)
+            elapsed = time.perf_counter() - start
+            print(f"{store_name:>8} {mode:>8} {args.users / elapsed:>12,.0f}")
+
+    os.unlink(_db_file.name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Lookup latency of UserDB.get_by_id / get_by_email as the table grows.
+
+    python -m benchmarks.user_lookup [--sizes 1000,10000,100000,1000000]
+
+With the hash indexes both lookups should stay flat across sizes.
+"""
+import argparse
+import random
+import time
+
+from app.db.users import UserDB
+from app.models import UserCreate
+
+
+def populate(size: int) -> UserDB:
+    db = UserDB()
+    for i in range(size):
+        db.create(UserCreate(email=f"user{i}@example.com", name=f"User {i}"))
+    return db
+
+
+def measure(fn, keys) -> float:
+    start = time.perf_counter()
+    for key in keys:
+        fn(key)
+    return (time.perf_counter() - start) / len(keys) * 1e9
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000")
+    parser.add_argument("--lookups", type=int, default=100000)
+    args = parser.parse_args()
+
+    print(f"{'users':>10} {'get_by_id ns':>14} {'get_by_email ns':>16}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        db = populate(size)
+        ids = [random.randint(1, size) for _ in range(args.lookups)]
+        emails = [f"USER{i - 1}@example.com" for i in ids]
+        by_id = measure(db.get_by_id, ids)
+        by_email = measure(db.get_by_email, emails)
+        print(f"{size:>10} {by_id:>14.0f} {by_email:>16.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Query latency of the in-memory prefix search index as the table grows.
+
+    python -m benchmarks.user_search [--sizes 10000,100000,1000000]
+
+Users get random first/last names and unique email local parts, so
+first-name queries match thousands of users while full names and email
+prefixes are selective.
+"""
+import argparse
+import random
+import statistics
+import time
+
+from app.db.users import UserDB
+from app.models import UserCreate
+
+FIRST = ["james", "mary", "john", "patricia", "robert", "jennifer", "michael",
+         "linda", "william", "elizabeth", "david", "barbara", "richard", "susan",
+         "joseph", "jessica", "thomas", "sarah", "charles", "karen"]
+LAST = [f"{stem}{suffix}" for stem in ("smith", "johnson", "brown", "garcia", "miller",
+                                       "davis", "rodriguez", "martinez", "wilson", "anderson")
+        for suffix in ("", "son", "ton", "ley", "field", "man", "berg", "stein", "er", "ford")]
+
+QUERIES = ["jennifer", "jenn", "mary smith", "wilsonford", "user12345", "robert gar", "zzz"]
+
+
+def populate(size: int) -> UserDB:
+    db = UserDB()
+    rng = random.Random(0)
+    batch = []
+    for i in range(size):
+        batch.append(UserCreate(
+            email=f"user{i}@example.com",
+            name=f"{rng.choice(FIRST).title()} {rng.choice(LAST).title()}",
+        ))
+        if len(batch) == 10000:
+            db.create_many(batch)
+            batch = []
+    db.create_many(batch)
+    return db
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    for size in (int(s) for s in args.sizes.split(",")):
+        db = populate(size)
+        print(f"\n{size:,} users")
+        print(f"{'query':<14} {'p50 us':>9} {'p99 us':>9}")
+        for query in QUERIES:
+            samples = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                db.search(query, limit=20)
+                samples.append((time.perf_counter() - start) * 1e6)
+            samples.sort()
+            p99 = samples[int(len(samples) * 0.99) - 1]
+            print(f"{query:<14} {statistics.median(samples):>9.1f} {p99:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
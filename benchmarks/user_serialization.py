@@ -0,0 +1,50 @@
+"""
+Requests/sec for user reads with and without the user_json_fast_path flag.
+
+    python -m benchmarks.user_serialization [--users 1000] [--requests 3000]
+"""
+import argparse
+import asyncio
+import sys
+
+from app.config.features import feature_flags
+from app.main import app
+from app.middleware.rate_limit import rate_limiter, sliding_rate_limiter
+from app.models import UserCreate
+from app.routes.users import db
+from benchmarks.asgi import requests_per_second
+
+PATHS = ["/users/42", "/users/?limit=100"]
+
+
+async def run(requests: int) -> dict:
+    results = {}
+    for path in PATHS:
+        feature_flags.disable("user_json_fast_path")
+        pydantic_rps = await requests_per_second(app, "GET", path, requests)
+        feature_flags.enable("user_json_fast_path")
+        fast_rps = await requests_per_second(app, "GET", path, requests)
+        results[path] = (pydantic_rps, fast_rps)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=3000)
+    args = parser.parse_args()
+
+    rate_limiter.requests_per_minute = sys.maxsize
+    sliding_rate_limiter.requests_per_minute = sys.maxsize
+    db.create_many([
+        UserCreate(email=f"user{i}@example.com", name=f"User {i}") for i in range(args.users)
+    ])
+
+    results = asyncio.run(run(args.requests))
+    print(f"{'path':<20} {'pydantic req/s':>15} {'fast path req/s':>16} {'speedup':>8}")
+    for path, (slow, fast) in results.items():
+        print(f"{path:<20} {slow:>15,.0f} {fast:>16,.0f} {fast / slow:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Read/write throughput of the in-memory UserDB versus the SQLite UserRepository.
+
+    python -m benchmarks.user_store_throughput [--users 20000] [--reads 50000]
+
+The SQLite path runs against a temporary file database so the numbers
+include real journaling rather than a per-connection :memory: database.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+_db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+os.environ.setdefault("DATABASE_URL", _db_file.name)
+
+from app.db.repository import UserRepository  # noqa: E402
+from app.db.users import UserDB  # noqa: E402
+from app.models import UserCreate  # noqa: E402
+
+
+def run(store, users: int, reads: int) -> dict:
+    payloads = [
+        UserCreate(email=f"user{i}@example.com", name=f"User {i}") for i in range(users)
+    ]
+
+    start = time.perf_counter()
+    for payload in payloads:
+        store.create(payload)
+    write_secs = time.perf_counter() - start
+
+    ids = [random.randint(1, users) for _ in range(reads)]
+    start = time.perf_counter()
+    for user_id in ids:
+        store.get_by_id(user_id)
+    id_secs = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for user_id in ids:
+        store.get_by_email(f"user{user_id - 1}@example.com")
+    email_secs = time.perf_counter() - start
+
+    return {
+        "writes/s": users / write_secs,
+        "get_by_id/s": reads / id_secs,
+        "get_by_email/s": reads / email_secs,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--reads", type=int, default=50000)
+    args = parser.parse_args()
+
+    results = {
+        "memory": run(UserDB(), args.users, args.reads),
+        "sqlite": run(UserRepository(), args.users, args.reads),
+    }
+
+    columns = list(results["memory"].keys())
+    print(f"{'store':>8} " + " ".join(f"{c:>16}" for c in columns))
+    for name, row in results.items():
+        print(f"{name:>8} " + " ".join(f"{row[c]:>16,.0f}" for c in columns))
+
+    os.unlink(_db_file.name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""
+Local stand-in for a Redis-protocol server.
+
+    python -m tests.resp_server [--port 6390]
+
+Implements the handful of commands the RESP-backed rate limiter and cache
+use (strings, counters, sets, expiry), single-threaded on asyncio. It exists so
+those backends can be exercised and benchmarked without a real server;
+it is not meant for production use.
+"""
+import argparse
+import asyncio
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class Store:
+    def __init__(self):
+        self._data: Dict[bytes, Any] = {}
+        self._expires: Dict[bytes, float] = {}
+
+    def _alive(self, key: bytes) -> bool:
+        expires_at = self._expires.get(key)
+        if expires_at is not None and expires_at <= time.monotonic():
+            self._data.pop(key, None)
+            del self._expires[key]
+        return key in self._data
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        value = self._data[key] if self._alive(key) else None
+        if isinstance(value, set):
+            raise Error("WRONGTYPE Operation against a key holding the wrong kind of value")
+        return value
+
+    def members(self, key: bytes) -> set:
+        value = self._data[key] if self._alive(key) else set()
+        if not isinstance(value, set):
+            raise Error("WRONGTYPE Operation against a key holding the wrong kind of value")
+        return value
+
+    def add(self, key: bytes, members: List[bytes]) -> int:
+        value = self.members(key)
+        before = len(value)
+        value.update(members)
+        self._data[key] = value
+        return len(value) - before
+
+    def set(self, key: bytes, value: bytes, ttl: Optional[float] = None) -> None:
+        self._data[key] = value
+        if ttl is None:
+            self._expires.pop(key, None)
+        else:
+            self._expires[key] = time.monotonic() + ttl
+
+    def delete(self, key: bytes) -> int:
+        existed = self._alive(key)
+        self._data.pop(key, None)
+        self._expires.pop(key, None)
+        return int(existed)
+
+    def expire(self, key: bytes, ttl: float, condition: bytes = b"") -> int:
+        if not self._alive(key):
+            return 0
+        expires_at = time.monotonic() + ttl
+        current = self._expires.get(key)
+        # As in Redis, a key without an expiry counts as an infinite TTL.
+        if condition == b"NX" and current is not None:
+            return 0
+        if condition == b"XX" and current is None:
+            return 0
+        if condition == b"GT" and (current is None or expires_at <= current):
+            return 0
+        if condition == b"LT" and current is not None and expires_at >= current:
+            return 0
+        self._expires[key] = expires_at
+        return 1
+
+    def persist(self, key: bytes) -> int:
+        if not self._alive(key) or key not in self._expires:
+            return 0
+        del self._expires[key]
+        return 1
+
+    def ttl(self, key: bytes) -> int:
+        if not self._alive(key):
+            return -2
+        expires_at = self._expires.get(key)
+        if expires_at is None:
+            return -1
+        return max(0, round(expires_at - time.monotonic()))
+
+    def incr(self, key: bytes, amount: int) -> int:
+        value = int(self.get(key) or 0) + amount
+        self._data[key] = str(value).encode()
+        return value
+
+    def scan(self, pattern: bytes) -> List[bytes]:
+        prefix = pattern[:-1] if pattern.endswith(b"*") else None
+        keys = []
+        for key in list(self._data):
+            if not self._alive(key):
+                continue
+            if (prefix is not None and key.startswith(prefix)) or key == pattern:
+                keys.append(key)
+        return keys
+
+
+class Error(Exception):
+    pass
+
+
+def execute(store: Store, args: List[bytes]) -> Any:
+    command = args[0].upper()
+    if command == b"PING":
+        return "PONG"
+    if command == b"SELECT":
+        return "OK"
+    if command == b"GET":
+        return store.get(args[1])
+    if command == b"SET":
+        ttl = None
+        options = [arg.upper() for arg in args[3:]]
+        if b"EX" in options:
+            ttl = float(args[3 + options.index(b"EX") + 1])
+        elif b"PX" in options:
+            ttl = float(args[3 + options.index(b"PX") + 1]) / 1000
+        if b"NX" in options and store.get(args[1]) is not None:
+            return None
+        store.set(args[1], args[2], ttl)
+        return "OK"
+    if command == b"MGET":
+        return [store.get(key) for key in args[1:]]
+    if command == b"MSET":
+        for key, value in zip(args[1::2], args[2::2]):
+            store.set(key, value)
+        return "OK"
+    if command == b"DEL":
+        return sum(store.delete(key) for key in args[1:])
+    if command == b"EXISTS":
+        return sum(store._alive(key) for key in args[1:])
+    if command in (b"INCR", b"DECR", b"INCRBY", b"DECRBY"):
+        amount = int(args[2]) if len(args) > 2 else 1
+        if command.startswith(b"DECR"):
+            amount = -amount
+        return store.incr(args[1], amount)
+    if command == b"EXPIRE":
+        return store.expire(args[1], float(args[2]), args[3].upper() if len(args) > 3 else b"")
+    if command == b"PEXPIRE":
+        return store.expire(args[1], float(args[2]) / 1000, args[3].upper() if len(args) > 3 else b"")
+    if command == b"PERSIST":
+        return store.persist(args[1])
+    if command == b"SADD":
+        return store.add(args[1], args[2:])
+    if command == b"SMEMBERS":
+        return sorted(store.members(args[1]))
+    if command == b"TTL":
+        return store.ttl(args[1])
+    if command == b"KEYS":
+        return store.scan(args[1])
+    if command == b"FLUSHDB":
+        store._data.clear()
+        store._expires.clear()
+        return "OK"
+    raise Error(f"ERR unknown command '{command.decode()}'")
+
+
+def encode(reply: Any) -> bytes:
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, str):
+        return b"+%s\r\n" % reply.encode()
+    if isinstance(reply, Error):
+        return b"-%s\r\n" % str(reply).encode()
+    if isinstance(reply, (bool, int)):
+        return b":%d\r\n" % reply
+    if isinstance(reply, bytes):
+        return b"$%d\r\n%s\r\n" % (len(reply), reply)
+    if isinstance(reply, list):
+        return b"*%d\r\n" % len(reply) + b"".join(encode(item) for item in reply)
+    raise TypeError(f"Cannot encode {type(reply)}")
+
+
+async def read_command(reader: asyncio.StreamReader) -> Optional[List[bytes]]:
+    line = await reader.readline()
+    if not line:
+        return None
+    if not line.startswith(b"*"):
+        return line.split()
+    args = []
+    for _ in range(int(line[1:-2])):
+        length = int((await reader.readline())[1:-2])
+        args.append((await reader.readexactly(length + 2))[:-2])
+    return args
+
+
+def handler(store: Store):
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                args = await read_command(reader)
+                if args is None:
+                    break
+                try:
+                    reply = execute(store, args)
+                except Error as e:
+                    reply = e
+                except (IndexError, ValueError):
+                    reply = Error("ERR syntax error")
+                writer.write(encode(reply))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+    return handle
+
+
+async def serve(host: str, port: int) -> None:
+    server = await asyncio.start_server(handler(Store()), host, port)
+    async with server:
+        await server.serve_forever()
+
+
+def start_in_thread(host: str = "127.0.0.1", port: int = 0) -> Tuple[str, int]:
+    """Run a server on a daemon thread; returns the bound (host, port)."""
+    ready = threading.Event()
+    address: List[Tuple[str, int]] = []
+
+    async def run() -> None:
+        server = await asyncio.start_server(handler(Store()), host, port)
+        address.append(server.sockets[0].getsockname()[:2])
+        ready.set()
+        async with server:
+            await server.serve_forever()
+
+    threading.Thread(target=lambda: asyncio.run(run()), daemon=True).start()
+    ready.wait()
+    return address[0]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6390)
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port))
@@ -0,0 +1,86 @@
+import itertools
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.auth import jwt, password
+from app.auth.revocation import RevocationStore, RevocationStoreFullError, _now
+from app.config.settings import settings
+from app.main import app
+
+_emails = (f"auth{i}@example.com" for i in itertools.count())
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(settings.rate_limit, "enabled", False)
+    monkeypatch.setattr(password, "_iterations", 1000)
+    return TestClient(app)
+
+
+@pytest.fixture
+def tokens(client):
+    response = client.post(
+        "/auth/register",
+        json={"email": next(_emails), "name": "Auth", "password": "correct horse"},
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def _bearer(tokens):
+    return {"Authorization": f"Bearer {tokens['access_token']}"}
+
+
+def test_refresh_rotates_and_rejects_replay(client, tokens):
+    response = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 200
+    rotated = response.json()
+    assert rotated["refresh_token"] != tokens["refresh_token"]
+
+    replay = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert replay.status_code == 401
+    assert client.post("/auth/refresh", json={"refresh_token": rotated["refresh_token"]}).status_code == 200
+
+
+def test_refresh_rejects_access_token(client, tokens):
+    response = client.post("/auth/refresh", json={"refresh_token": tokens["access_token"]})
+    assert response.status_code == 401
+
+
+def test_logout_revokes_access_and_refresh_tokens(client, tokens):
+    assert client.get("/auth/me", headers=_bearer(tokens)).status_code == 200
+
+    response = client.post(
+        "/auth/logout", headers=_bearer(tokens), json={"refresh_token": tokens["refresh_token"]}
+    )
+    assert response.status_code == 200
+
+    access = jwt.decode_token_unsafe(tokens["access_token"])
+    assert jwt.revocation_store.is_revoked(access["jti"])
+    assert client.get("/auth/me", headers=_bearer(tokens)).status_code == 401
+    assert client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 401
+
+
+def test_full_revocation_store_returns_503(client, tokens, monkeypatch):
+    monkeypatch.setattr(jwt.revocation_store, "_max_entries", len(jwt.revocation_store._revoked))
+
+    response = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "60"
+
+    response = client.post("/auth/logout", headers=_bearer(tokens))
+    assert response.status_code == 503
+    assert client.get("/auth/me", headers=_bearer(tokens)).status_code == 200
+
+
+def test_revocation_store_never_drops_a_live_entry():
+    store = RevocationStore(max_entries=2)
+    assert store.revoke("a", _now() + 60)
+    assert store.revoke("b", _now() - 1)
+    assert store.revoke("c", _now() + 60)
+    with pytest.raises(RevocationStoreFullError):
+        store.revoke("d", _now() + 60)
+    assert store.is_revoked("a") and store.is_revoked("c")
+    assert not store.revoke("a", _now() + 60)
+    assert store.stats()["rejections"] == 1
@@ -0,0 +1,110 @@
+import socket
+import time
+from datetime import datetime
+
+import pytest
+
+from app.cache.backend import RESPCache
+from app.models import User
+from tests.resp_server import start_in_thread
+
+
+@pytest.fixture(scope="module")
+def url():
+    host, port = start_in_thread()
+    return f"redis://{host}:{port}/0"
+
+
+@pytest.fixture
+def cache(url):
+    cache = RESPCache(url, default_ttl=60)
+    cache.clear()
+    yield cache
+    cache.close()
+
+
+def test_round_trip_pickled_value(cache):
+    user = User(id=1, email="a@example.com", name="A", created_at=datetime.utcnow())
+    assert cache.set("user:1", user)
+    assert cache.get("user:1") == user
+    assert cache.exists("user:1")
+    assert not cache.exists("user:2")
+    assert cache.get("user:2") is None
+
+
+def test_delete(cache):
+    cache.set("user:1", 1)
+    assert cache.delete("user:1")
+    assert not cache.delete("user:1")
+
+
+def test_ttl_expires_entry(cache):
+    assert cache.set("short", 1, ttl=0.05)
+    time.sleep(0.1)
+    assert cache.get("short") is None
+
+
+def test_zero_ttl_never_expires(url):
+    cache = RESPCache(url, default_ttl=0.05)
+    cache.set("forever", 1, ttl=0)
+    time.sleep(0.1)
+    assert cache.get("forever") == 1
+    cache.close()
+
+
+def test_set_many_and_get_many(cache):
+    assert cache.set_many({f"k{i}": i for i in range(10)})
+    assert cache.get_many([f"k{i}" for i in range(12)]) == {f"k{i}": i for i in range(10)}
+    assert cache.get_many([]) == {}
+
+
+def test_clear_only_touches_its_prefix(cache):
+    cache.set_many({f"k{i}": i for i in range(10)})
+    cache._client.execute("SET", "foreign", "x")
+    cache.clear()
+    assert cache.get_many([f"k{i}" for i in range(10)]) == {}
+    assert cache._client.execute("GET", "foreign") == b"x"
+
+
+def test_clients_share_data(cache, url):
+    other = RESPCache(url, default_ttl=60)
+    cache.set("user:1", {"name": "A"})
+    assert other.get("user:1") == {"name": "A"}
+    other.delete("user:1")
+    assert cache.get("user:1") is None
+    other.close()
+
+
+def test_invalidate_tag(cache):
+    cache.set("user:1", 1, tags=["team:1"])
+    cache.set("user:2", 2, ttl=0, tags=["team:1"])
+    cache.set("user:3", 3, tags=["team:2"])
+    assert cache.invalidate_tag("team:1") == 2
+    assert cache.get_many(["user:1", "user:2", "user:3"]) == {"user:3": 3}
+
+
+def test_tag_outlives_shorter_ttls_for_persistent_keys(cache):
+    cache.set("user:1", 1, ttl=0, tags=["team:1"])
+    cache.set("user:2", 2, ttl=0.05, tags=["team:1"])
+    time.sleep(0.1)
+    assert cache.invalidate_tag("team:1") == 1
+    assert cache.get("user:1") is None
+
+
+def test_invalidate_prefix(cache):
+    cache.set_many({"user:1": 1, "user:email:a": 2, "users:1": 3})
+    assert cache.invalidate_prefix("user:") == 2
+    assert cache.get_many(["user:1", "user:email:a", "users:1"]) == {"users:1": 3}
+    with pytest.raises(ValueError):
+        cache.invalidate_prefix("user")
+
+
+def test_fails_soft_when_server_is_unreachable():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        dead_port = sock.getsockname()[1]
+    dead = RESPCache(f"redis://127.0.0.1:{dead_port}/0", timeout=0.05)
+    assert dead.get("x") is None
+    assert not dead.set("x", 1)
+    assert dead.get_many(["x"]) == {}
+    assert dead.stats()["errors"] == 3